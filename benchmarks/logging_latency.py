@@ -0,0 +1,55 @@
+"""Benchmark of request logging latency with synchronous and queue-based file logging
+
+Usage: python -m benchmarks.logging_latency [records_number]
+"""
+
+import sys
+from os import remove
+from time import perf_counter
+
+from flask import Flask
+
+from movie_library.log import Log
+
+RECORD_ARGS = ('<User \'2.username\'>', 'POST', '/movies',
+               '<Movie \'1.The Dark Knight\'>', {'title': 'The Dark Knight', 'genres': [1, 2, 3],
+                                                 'description': 'Description ' * 50})
+
+
+def measure_latencies(log_async: bool, records_number: int) -> list:
+    """Measures duration of every log call in microseconds"""
+    app = Flask('logging_latency_benchmark')
+    app.config.update(LOG_ASYNC=log_async, LOG_QUEUE_SIZE=records_number,
+                      LOG_QUEUE_POLICY='drop', LOG_QUEUE_BLOCK_TIMEOUT=0.1)
+    log = Log(app)
+    log.clear_log()
+
+    latencies = []
+    for _ in range(records_number):
+        start = perf_counter()
+        log.logger.info('%s - %s - %s - %s - %s', *RECORD_ARGS)
+        latencies.append((perf_counter() - start) * 1e6)
+
+    log.stop_listener()
+    remove(log.log_path)
+    return sorted(latencies)
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """Gets percentile of sorted values"""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+def main():
+    """Prints p50, p99 and max latency of both logging modes"""
+    records_number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f'{records_number} records, latency of a log call in microseconds')
+    print(f'{"mode":<8}{"p50":>10}{"p99":>10}{"max":>12}')
+    for mode, log_async in (('sync', False), ('async', True)):
+        latencies = measure_latencies(log_async, records_number)
+        print(f'{mode:<8}{percentile(latencies, 50):>10.1f}{percentile(latencies, 99):>10.1f}'
+              f'{latencies[-1]:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
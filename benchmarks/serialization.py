@@ -0,0 +1,58 @@
+"""Benchmark of movie page serialization by flask-restx marshal and compiled serializer
+
+Usage: python -m benchmarks.serialization [pages_number]
+"""
+
+import sys
+from datetime import datetime
+from decimal import Decimal
+from json import dumps
+from time import perf_counter
+from types import SimpleNamespace
+
+from flask_restx import marshal
+
+from movie_library.models import movie_model_deserialize
+from movie_library.serializer import compile_model
+
+PAGE_SIZE = 50
+
+
+def make_movie(movie_id: int) -> SimpleNamespace:
+    """Makes object with attributes of movie and its nested objects"""
+    return SimpleNamespace(
+        id=movie_id, title=f'Movie {movie_id}', release_date=datetime(2008, 7, 18),
+        duration=152, rating=Decimal('9.05'), description='Description ' * 20,
+        preview='https://example.com/preview.jpg', budget=185000000.0,
+        user=SimpleNamespace(id=1, username='admin', email='admin@mail.com',
+                             first_name=None, last_name=None),
+        country=SimpleNamespace(id=1, title='USA'),
+        age_restriction=SimpleNamespace(id=3, title='PG-13'),
+        director=SimpleNamespace(id=1, first_name='Christopher', last_name='Nolan'),
+        genres=[SimpleNamespace(id=genre_id, title=f'Genre {genre_id}')
+                for genre_id in range(3)])
+
+
+def measure(serialize, page: list, pages_number: int) -> float:
+    """Measures average serialization and encoding time of a page in microseconds"""
+    start = perf_counter()
+    for _ in range(pages_number):
+        dumps(serialize(page))
+    return (perf_counter() - start) / pages_number * 1e6
+
+
+def main():
+    """Prints average time of both serialization paths"""
+    pages_number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    page = [make_movie(movie_id) for movie_id in range(PAGE_SIZE)]
+    compiled = compile_model(movie_model_deserialize)
+    assert dumps(compiled(page)) == dumps(marshal(page, movie_model_deserialize))
+
+    print(f'{pages_number} pages of {PAGE_SIZE} movies, time per page in microseconds')
+    for name, serialize in (('marshal', lambda data: marshal(data, movie_model_deserialize)),
+                            ('compiled', compiled)):
+        print(f'{name:<10}{measure(serialize, page, pages_number):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,109 @@
 """Commands module"""
 
+import csv
+import json
+from datetime import datetime
+from io import StringIO
+from itertools import islice
 from os import listdir, path
 from re import match
 from getpass import getpass
+from time import perf_counter
+from typing import Iterator, List
 
+import click
 from flask import Flask
 from marshmallow.exceptions import ValidationError
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError, DBAPIError
 from werkzeug.security import generate_password_hash
 
 from movie_library import db
-from movie_library.models import User
+from movie_library.models import User, TableVersion, MovieAggregate, ImportCheckpoint
 from movie_library.schemes.user import RegisterSchema
 
 EMAIL_PATTERN = r'^[A-Za-z0-9]+[._]?[A-Za-z0-9]+[@][A-Za-z]+[.][a-z]{2,3}$'
+IMPORT_TABLES = {'movies': 'movie', 'directors': 'director',
+                 'genres': 'genre', 'movie_genre': 'movie_genre'}
+COPY_NULL = '\\N'
+
+
+def reset_statement_timeout(dbapi_connection, connection_record, connection_proxy):
+    """Turns off statement timeout of checked out PostgreSQL connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('SET statement_timeout = 0')
+    cursor.close()
+
+
+def disable_statement_timeout():
+    """Turns off statement timeout of the web application for connections used by
+    the command, long imports and rebuilds must not be cancelled"""
+    if db.engine.dialect.name == 'postgresql' and \
+            not event.contains(db.engine, 'checkout', reset_statement_timeout):
+        event.listen(db.engine, 'checkout', reset_statement_timeout)
+
+
+def read_import_rows(file_path: str) -> Iterator[dict]:
+    """Streams rows from CSV file with header or from JSON lines file"""
+    with open(file_path, encoding='utf8', newline='') as import_file:
+        if file_path.endswith('.csv'):
+            yield from csv.DictReader(import_file)
+        elif file_path.endswith('.jsonl'):
+            for line in import_file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise click.BadParameter('Only .csv and .jsonl files are supported.')
+
+
+def coerce_import_row(table: db.Table, row: dict) -> dict:
+    """Converts row values to python types of table columns, empty values become NULL"""
+    unknown_columns = set(row) - set(table.columns.keys())
+    if unknown_columns:
+        raise click.BadParameter(f'Unknown {table.name} columns: '
+                                 f'{", ".join(sorted(unknown_columns))}.')
+
+    coerced_row = {}
+    for key, value in row.items():
+        python_type = table.columns[key].type.python_type
+        if value is None or (value == '' and python_type is not str):
+            coerced_row[key] = None
+        elif isinstance(value, python_type):
+            coerced_row[key] = value
+        elif python_type is datetime:
+            coerced_row[key] = datetime.fromisoformat(value)
+        elif python_type is bool:
+            coerced_row[key] = str(value).lower() in ('1', 'true', 't', 'yes')
+        else:
+            coerced_row[key] = python_type(value)
+    return coerced_row
+
+
+def insert_import_batch(table: db.Table, rows: List[dict]):
+    """Inserts batch of rows by COPY on PostgreSQL and by executemany on other databases,
+    errors of the raw COPY cursor are wrapped to DBAPIError like errors of SQLAlchemy"""
+    if db.engine.dialect.name != 'postgresql':
+        db.session.execute(table.insert(), rows)
+        return
+
+    columns = list(rows[0])
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([COPY_NULL if row.get(column) is None else row[column]
+                         for column in columns])
+    buffer.seek(0)
+
+    statement = f'COPY "{table.name}" ({", ".join(columns)}) ' \
+                f'FROM STDIN WITH (FORMAT csv, NULL \'{COPY_NULL}\')'
+    dbapi_error = db.engine.dialect.dbapi.Error
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(statement, buffer)
+    except dbapi_error as error:
+        raise DBAPIError.instance(statement, None, error, dbapi_error) from error
+    finally:
+        cursor.close()
 
 
 def add_commands(app: Flask):
@@ -57,6 +148,7 @@ def add_commands(app: Flask):
 
     @app.cli.command("db_insert_data")
     def db_insert_data():
+        disable_statement_timeout()
         directory = 'db_insert_data'
         for file_name in sorted(listdir(directory)):
             with open(path.join(directory, file_name), encoding='utf8') as table_inserts:
@@ -64,5 +156,76 @@ def add_commands(app: Flask):
                 insert_commands = table_inserts.read().replace('\n', '')
                 db.session.execute(insert_commands)
                 print(f'Data from {file_name} was successfully inserted.')
+        TableVersion.bump(table_name for table_name in db.metadata.tables
+                          if table_name != TableVersion.__tablename__)
+        MovieAggregate.rebuild()
         db.session.commit()
         print('All data was successfully inserted.')
+
+    @app.cli.command("db_bulk_import")
+    @click.argument('table_name', type=click.Choice(list(IMPORT_TABLES)))
+    @click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--batch-size', default=1000, show_default=True, type=click.IntRange(min=1),
+                  help='Number of rows inserted and committed at once.')
+    @click.option('--restart', is_flag=True,
+                  help='Ignore checkpoint of previous import and start from the first row.')
+    def db_bulk_import(table_name: str, file_path: str, batch_size: int, restart: bool):
+        """Streams rows from CSV or JSONL file to the table in batches,
+        after failure the import is resumed from the last committed batch,
+        number of imported rows is committed in the transaction of each batch"""
+        disable_statement_timeout()
+        table = db.metadata.tables[IMPORT_TABLES[table_name]]
+        file_path = path.abspath(file_path)
+        committed_rows = 0 if restart else \
+            ImportCheckpoint.get_committed_rows(table.name, file_path)
+        if committed_rows:
+            print(f'Resuming import after {committed_rows} committed rows...')
+
+        rows = islice(read_import_rows(file_path), committed_rows, None)
+        start_time = perf_counter()
+        imported_rows = 0
+        while True:
+            try:
+                batch = [coerce_import_row(table, row) for row in islice(rows, batch_size)]
+            except (ValueError, TypeError, ArithmeticError) as error:
+                raise click.ClickException(f'Incorrect value in batch after row '
+                                           f'{committed_rows}: {error}') from error
+            if not batch:
+                break
+            try:
+                insert_import_batch(table, batch)
+                ImportCheckpoint.save(table.name, file_path, committed_rows + len(batch))
+                TableVersion.bump([table.name])
+                db.session.commit()
+            except SQLAlchemyError as error:
+                db.session.rollback()
+                raise click.ClickException(f'Batch after row {committed_rows} failed, '
+                                           f'rerun the command to resume. {error}') from error
+
+            committed_rows += len(batch)
+            imported_rows += len(batch)
+            rate = imported_rows / (perf_counter() - start_time)
+            print(f'{committed_rows} rows imported ({rate:.0f} rows/s)')
+
+        if 'id' in table.columns and db.engine.dialect.name == 'postgresql':
+            db.session.execute(text(f'SELECT setval(pg_get_serial_sequence(\'"{table.name}"\', '
+                                    f'\'id\'), max(id)) FROM "{table.name}"'))
+            db.session.commit()
+        if table.name in ('movie', 'movie_genre'):
+            MovieAggregate.rebuild()
+            TableVersion.bump([MovieAggregate.__tablename__])
+            db.session.commit()
+            print('Analytics aggregates were rebuilt.')
+        ImportCheckpoint.forget(table.name, file_path)
+        db.session.commit()
+        print(f'All data from {file_path} was successfully imported to {table.name}.')
+
+    @app.cli.command("db_rebuild_analytics")
+    def db_rebuild_analytics():
+        """Recomputes catalog analytics aggregates from movies, run it after
+        movies were changed bypassing the application, e.g. by db_bulk_import"""
+        disable_statement_timeout()
+        group_count = MovieAggregate.rebuild()
+        TableVersion.bump([MovieAggregate.__tablename__])
+        db.session.commit()
+        print(f'Analytics aggregates were successfully rebuilt, {group_count} groups.')
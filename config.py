@@ -9,6 +9,25 @@ env = {'production': 'config.ProductionConfig',
        'default': 'config.ProductionConfig'}
 
 
+def get_engine_options() -> dict:
+    """Builds PostgreSQL engine options from environment variables,
+    statement timeout in milliseconds is set by every new connection, 0 disables it,
+    long running CLI commands and migrations turn it off for their connections"""
+    connect_args = {'connect_timeout': int(environ.get('DB_CONNECT_TIMEOUT', 10))}
+    statement_timeout = int(environ.get('DB_STATEMENT_TIMEOUT', 30000))
+    if statement_timeout:
+        connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+
+    return {
+        'pool_size': int(environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(environ.get('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': int(environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'connect_args': connect_args,
+    }
+
+
 class Config:
     """Base config"""
     DEBUG = False
@@ -16,11 +35,34 @@ class Config:
     SECRET_KEY = 'secret_key'
     RESTX_MASK_SWAGGER = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    REFERENCE_CACHE_TTL = int(environ.get('REFERENCE_CACHE_TTL', 300))
+    USER_CACHE_TTL = int(environ.get('USER_CACHE_TTL', 30))
+    COUNT_CACHE_TTL = int(environ.get('COUNT_CACHE_TTL', 60))
+    FACETS_CACHE_TTL = int(environ.get('FACETS_CACHE_TTL', 60))
+    LAST_ACTIVITY_FLUSH_INTERVAL = int(environ.get('LAST_ACTIVITY_FLUSH_INTERVAL', 60))
+    DB_REPLICA_URIS = [uri for uri in environ.get('DB_REPLICA_URIS', '').split(',') if uri]
+    DB_READ_YOUR_WRITES_WINDOW = float(environ.get('DB_READ_YOUR_WRITES_WINDOW', 5))
+    RESPONSE_CACHE_BACKEND = environ.get('RESPONSE_CACHE_BACKEND', '')
+    RESPONSE_CACHE_URL = environ.get('RESPONSE_CACHE_URL', '')
+    RESPONSE_CACHE_TTL = int(environ.get('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_HOT_KEYS = int(environ.get('RESPONSE_CACHE_HOT_KEYS', 20))
+    RESPONSE_CACHE_REFRESH_INTERVAL = int(environ.get('RESPONSE_CACHE_REFRESH_INTERVAL', 10))
+    CACHE_CONTROL_MAX_AGE = int(environ.get('CACHE_CONTROL_MAX_AGE', 5))
+    CACHE_CONTROL_STALE_WHILE_REVALIDATE = int(environ.get('CACHE_CONTROL_STALE_WHILE_REVALIDATE',
+                                                           30))
+    SINGLE_FLIGHT_TIMEOUT = float(environ.get('SINGLE_FLIGHT_TIMEOUT', 5))
+    BULK_MAX_ITEMS = int(environ.get('BULK_MAX_ITEMS', 10000))
+    COMPILED_SERIALIZER = environ.get('COMPILED_SERIALIZER', 'true').lower() == 'true'
+    LOG_ASYNC = environ.get('LOG_ASYNC', 'false').lower() == 'true'
+    LOG_QUEUE_SIZE = int(environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_QUEUE_POLICY = environ.get('LOG_QUEUE_POLICY', 'drop')
+    LOG_QUEUE_BLOCK_TIMEOUT = float(environ.get('LOG_QUEUE_BLOCK_TIMEOUT', 0.1))
 
 
 class ProductionConfig(Config):
     """Config used in production"""
     SECRET_KEY = environ.get('SECRET_KEY')
+    LOG_ASYNC = environ.get('LOG_ASYNC', 'true').lower() == 'true'
 
     DB_USER = environ.get('DB_USER')
     DB_PASSWORD = environ.get('DB_PASSWORD')
@@ -29,6 +71,7 @@ class ProductionConfig(Config):
     DB_NAME = environ.get('DB_NAME')
 
     SQLALCHEMY_DATABASE_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options()
 
 
 class DevelopmentConfig(Config):
@@ -42,9 +85,13 @@ class DevelopmentConfig(Config):
     DB_NAME = environ.get('DB_NAME')
 
     SQLALCHEMY_DATABASE_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options()
 
 
 class TestingConfig(Config):
     """Config used in testing"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    LAST_ACTIVITY_FLUSH_INTERVAL = 0
+    RESPONSE_CACHE_BACKEND = environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_HOT_KEYS = 0
@@ -25,6 +25,7 @@ config.set_main_option(
     str(current_app.extensions['migrate'].db.get_engine().url).replace(
         '%', '%%'))
 target_metadata = current_app.extensions['migrate'].db.metadata
+UNMAPPED_SCHEMA_OBJECTS = ('search_vector', 'ix_movie_search_vector')
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -71,6 +72,10 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # search schema objects are created by raw DDL and are not mapped to models
+    def include_object(object_, name, type_, reflected, compare_to):
+        return not (reflected and compare_to is None and name in UNMAPPED_SCHEMA_OBJECTS)
+
     connectable = current_app.extensions['migrate'].db.get_engine()
 
     with connectable.connect() as connection:
@@ -78,10 +83,14 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
         with context.begin_transaction():
+            # index builds and backfills may run longer than statement timeout of web requests
+            if connection.dialect.name == 'postgresql':
+                context.execute('SET statement_timeout = 0')
             context.run_migrations()
 
 
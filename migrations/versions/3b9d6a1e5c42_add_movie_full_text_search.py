@@ -0,0 +1,64 @@
+"""Add movie full-text search
+
+Revision ID: 3b9d6a1e5c42
+Revises: a165725093e7
+Create Date: 2026-10-17 10:12:31.482106
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d6a1e5c42'
+down_revision = 'a165725093e7'
+branch_labels = None
+depends_on = None
+
+
+# SQLite: external content FTS5 table kept in sync with the movie table by triggers
+SQLITE_CREATE_DDL = (
+    'CREATE VIRTUAL TABLE movie_fts USING fts5(title, description, '
+    'content=\'movie\', content_rowid=\'id\')',
+    'CREATE TRIGGER movie_fts_after_insert AFTER INSERT ON movie BEGIN '
+    'INSERT INTO movie_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER movie_fts_after_delete AFTER DELETE ON movie BEGIN '
+    'INSERT INTO movie_fts(movie_fts, rowid, title, description) '
+    'VALUES (\'delete\', old.id, old.title, old.description); END',
+    'CREATE TRIGGER movie_fts_after_update AFTER UPDATE ON movie BEGIN '
+    'INSERT INTO movie_fts(movie_fts, rowid, title, description) '
+    'VALUES (\'delete\', old.id, old.title, old.description); '
+    'INSERT INTO movie_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'INSERT INTO movie_fts(movie_fts) VALUES (\'rebuild\')',
+)
+SQLITE_DROP_DDL = (
+    'DROP TRIGGER IF EXISTS movie_fts_after_insert',
+    'DROP TRIGGER IF EXISTS movie_fts_after_delete',
+    'DROP TRIGGER IF EXISTS movie_fts_after_update',
+    'DROP TABLE IF EXISTS movie_fts',
+)
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.execute("ALTER TABLE movie ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+                   "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                   "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+                   ") STORED")
+        op.create_index('ix_movie_search_vector', 'movie', ['search_vector'],
+                        unique=False, postgresql_using='gin')
+    elif dialect_name == 'sqlite':
+        for statement in SQLITE_CREATE_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.drop_index('ix_movie_search_vector', table_name='movie')
+        op.drop_column('movie', 'search_vector')
+    elif dialect_name == 'sqlite':
+        for statement in SQLITE_DROP_DDL:
+            op.execute(statement)
@@ -1,21 +1,30 @@
 """Movie library application"""
 
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_restx import Api
 from flask_marshmallow import Marshmallow
 from flask_login import LoginManager
 
 from movie_library.log import Log
+from movie_library.activity import ActivityTracker
+from movie_library.pool_metrics import PoolMetrics
+from movie_library.replicas import RoutingSQLAlchemy, ReplicaRouter
+from movie_library.response_cache import ResponseCache
+from movie_library.single_flight import SingleFlight
 from config import env
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 migrate = Migrate()
 api = Api()
 ma = Marshmallow()
 login_manager = LoginManager()
 log = Log()
+activity_tracker = ActivityTracker()
+pool_metrics = PoolMetrics()
+replica_router = ReplicaRouter()
+response_cache = ResponseCache()
+single_flight = SingleFlight()
 
 
 def create_app(config: str):
@@ -23,11 +32,16 @@ def create_app(config: str):
     app = Flask(__name__)
     app.config.from_object(env.get(config, env['default']))
     db.init_app(app)
+    pool_metrics.init_app(app, db)
+    replica_router.init_app(app)
     migrate.init_app(app, db, compare_type=True)
     api.init_app(app)
     ma.init_app(app)
     login_manager.init_app(app)
     log.init_app(app)
+    activity_tracker.init_app(app)
+    response_cache.init_app(app)
+    single_flight.init_app(app)
 
     with app.app_context():
         from movie_library import models
@@ -0,0 +1,90 @@
+"""User activity tracking module"""
+
+import atexit
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+
+from flask import Flask
+from sqlalchemy import update, bindparam, or_
+from sqlalchemy.exc import SQLAlchemyError
+
+
+class ActivityTracker:
+    """Records last activity of users in memory and writes it to database
+    by single bulk update not more often than once per flush interval"""
+
+    def __init__(self, app: Flask = None):
+        """Constructor takes application which config contains flush interval"""
+        self.app = None
+        self.flush_interval = 0
+        self.pending = {}
+        self.last_flush = monotonic()
+        self.recorded = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Configures flush interval and flushing on process exit"""
+        self.app = app
+        self.flush_interval = app.config['LAST_ACTIVITY_FLUSH_INTERVAL']
+        atexit.register(self.flush_on_exit)
+
+    def record(self, user_id: int, activity_time: datetime = None):
+        """Remembers user activity time, only the latest time per user is kept"""
+        with self._lock:
+            self.pending[user_id] = activity_time or datetime.now()
+            self.recorded += 1
+
+    def flush_if_due(self):
+        """Flushes recorded activity if flush interval has passed since the last flush"""
+        if monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Writes recorded activity to database by single bulk update, on database error
+        the activity is queued again for the next flush and the error is only logged,
+        because flush runs before unrelated requests"""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = monotonic()
+        if not pending:
+            return
+
+        from movie_library import db, log
+        from movie_library.models import User
+
+        user_table = User.__table__
+        statement = update(user_table). \
+            where(user_table.c.id == bindparam('user_id'),
+                  or_(user_table.c.last_activity.is_(None),
+                      user_table.c.last_activity < bindparam('activity_time'))). \
+            values(last_activity=bindparam('activity_time'))
+        try:
+            db.session.execute(statement, [{'user_id': user_id, 'activity_time': activity_time}
+                                           for user_id, activity_time in pending.items()])
+            db.session.commit()
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            with self._lock:
+                for user_id, activity_time in pending.items():
+                    self.pending[user_id] = max(activity_time,
+                                                self.pending.get(user_id, activity_time))
+                self.flush_errors += 1
+            log.logger.error('Activity flush of %d users failed - %s', len(pending), error)
+        else:
+            self.flushes += 1
+
+    def flush_on_exit(self):
+        """Flushes recorded activity before worker process exits"""
+        if self.pending:
+            with self.app.app_context():
+                self.flush()
+
+    def stats(self) -> dict:
+        """Returns numbers of recorded activities, flushes, failed flushes and pending users"""
+        return {'recorded': self.recorded, 'flushes': self.flushes,
+                'flush_errors': self.flush_errors, 'pending': len(self.pending)}
@@ -0,0 +1,134 @@
+"""Catalog analytics module keeps movie aggregates up to date, movies changed
+in a transaction are read before their first change and before commit,
+the difference of their contributions is added to aggregate rows before commit"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+
+from movie_library import db
+from movie_library.models import Movie, Genre, Director, Country, TableVersion, \
+    MovieAggregate, movie_genre
+from movie_library.models.movie import AGGREGATED_COLUMNS
+
+# session info key of contributions of tracked movies before the transaction changed them
+OLD_CONTRIBUTIONS_KEY = 'analytics_old_contributions'
+# session info key of groups which objects were deleted in the transaction
+REMOVED_GROUPS_KEY = 'analytics_removed_groups'
+AGGREGATED_ATTRIBUTES = (*AGGREGATED_COLUMNS, 'genres')
+GROUP_DIMENSIONS = {Genre: 'genre', Director: 'director', Country: 'country'}
+READ_CHUNK_SIZE = 1000
+
+# groups of movie with its rating and budget
+Contribution = Tuple[List[Tuple[str, int]], Optional[float], Optional[float]]
+
+
+def get_contributions(movie_ids: Iterable[int], lock: bool = False) -> Dict[int, Contribution]:
+    """Reads groups, ratings and budgets of existing movies by their ids,
+    with lock movie rows stay locked until the end of the transaction"""
+    movie_ids = list(movie_ids)
+    contributions = {}
+    for start in range(0, len(movie_ids), READ_CHUNK_SIZE):
+        ids_chunk = movie_ids[start:start + READ_CHUNK_SIZE]
+        statement = select(Movie.id, Movie.director_id, Movie.country_id,
+                           Movie.release_date, Movie.rating, Movie.budget). \
+            where(Movie.id.in_(ids_chunk))
+        if lock:
+            statement = statement.with_for_update(of=Movie.__table__)
+        for movie_id, director_id, country_id, release_date, rating, budget in \
+                db.session.execute(statement):
+            groups = [('director', director_id), ('country', country_id),
+                      ('year', release_date.year if release_date else None)]
+            contributions[movie_id] = ([group for group in groups if group[1] is not None],
+                                       rating, budget)
+        for movie_id, genre_id in db.session.execute(
+                select(movie_genre.c.movie_id, movie_genre.c.genre_id).
+                where(movie_genre.c.movie_id.in_(ids_chunk))):
+            if movie_id in contributions:
+                contributions[movie_id][0].append(('genre', genre_id))
+    return contributions
+
+
+def track_movies(movie_ids: Iterable[int]):
+    """Remembers contributions of movies before they are changed in the current
+    transaction, movies tracked earlier in the transaction are skipped.
+    The movies are locked, so concurrent transactions changing them wait for commit
+    and read contributions this one leaves instead of subtracting the same ones again"""
+    old_contributions = db.session.info.setdefault(OLD_CONTRIBUTIONS_KEY, {})
+    untracked_ids = [movie_id for movie_id in movie_ids if movie_id not in old_contributions]
+    contributions = get_contributions(untracked_ids, lock=True)
+    for movie_id in untracked_ids:
+        old_contributions[movie_id] = contributions.get(movie_id)
+
+
+def add_contribution(deltas: Dict[Tuple[str, int], list],
+                     contribution: Optional[Contribution], sign: int):
+    """Adds or subtracts movie contribution to sums of its groups"""
+    if contribution is None:
+        return
+    groups, rating, budget = contribution
+    for group in groups:
+        sums = deltas.setdefault(group, [0, 0, 0, 0, 0.0])
+        sums[0] += sign
+        if rating is not None:
+            sums[1] += sign
+            sums[2] += sign * rating
+        if budget is not None:
+            sums[3] += sign
+            sums[4] += sign * budget
+
+
+def is_aggregate_changed(movie: Movie) -> bool:
+    """Checks aggregated attributes of the movie are changed"""
+    attributes = inspect(movie).attrs
+    return any(attributes[name].history.has_changes() for name in AGGREGATED_ATTRIBUTES)
+
+
+@event.listens_for(db.session, 'before_flush')
+def track_flushed_movies(session, flush_context, instances):
+    """Tracks changed and deleted movies and groups of deleted objects before flush"""
+    track_movies(object_.id for object_ in session.deleted.union(session.dirty)
+                 if isinstance(object_, Movie) and object_.id is not None and
+                 (object_ in session.deleted or is_aggregate_changed(object_)))
+    session.info.setdefault(REMOVED_GROUPS_KEY, set()).update(
+        (GROUP_DIMENSIONS[type(object_)], object_.id) for object_ in session.deleted
+        if type(object_) in GROUP_DIMENSIONS)
+
+
+@event.listens_for(db.session, 'after_flush')
+def track_new_movies(session, flush_context):
+    """Tracks movies inserted by flush, they had no contribution before"""
+    old_contributions = session.info.setdefault(OLD_CONTRIBUTIONS_KEY, {})
+    for object_ in session.new:
+        if isinstance(object_, Movie):
+            old_contributions.setdefault(object_.id, None)
+
+
+@event.listens_for(db.session, 'before_commit')
+def update_aggregates(session):
+    """Adds differences of tracked movies contributions to aggregates
+    and deletes groups of deleted objects"""
+    session.flush()
+    old_contributions = session.info.pop(OLD_CONTRIBUTIONS_KEY, {})
+    removed_groups = session.info.pop(REMOVED_GROUPS_KEY, set())
+    if not old_contributions and not removed_groups:
+        return
+
+    new_contributions = get_contributions(old_contributions)
+    deltas = {}
+    for movie_id, old_contribution in old_contributions.items():
+        add_contribution(deltas, old_contribution, -1)
+        add_contribution(deltas, new_contributions.get(movie_id), 1)
+    for group in removed_groups:
+        deltas.pop(group, None)
+
+    MovieAggregate.apply_deltas(deltas)
+    MovieAggregate.delete_groups(removed_groups)
+    TableVersion.bump([MovieAggregate.__tablename__])
+
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_tracked_movies(session):
+    """Forgets movies tracked in rolled back transaction"""
+    session.info.pop(OLD_CONTRIBUTIONS_KEY, None)
+    session.info.pop(REMOVED_GROUPS_KEY, None)
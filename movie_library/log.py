@@ -1,11 +1,49 @@
 """Logging module"""
 
+import atexit
 import logging
+import os
+from logging.handlers import QueueHandler, QueueListener
 from os import path
+from queue import Queue, Full
 
 from flask import Flask
 
 
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler which drops the record or waits for a free place in the queue
+    for a limited time when the queue is full"""
+
+    def __init__(self, queue: Queue, policy: str = 'drop', block_timeout: float = 0.1):
+        """Constructor takes bounded queue, full queue policy ('drop' or 'block')
+        and time in seconds the block policy waits for a free place"""
+        super().__init__(queue)
+        if policy not in ('drop', 'block'):
+            raise ValueError(f'Incorrect log queue policy \'{policy}\'. '
+                             f'Use \'drop\' or \'block\'.')
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Leaves message formatting to the listener thread, records are not pickled
+        by in-process queue, so only exception info is rendered here"""
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """Puts record to the queue according to the full queue policy"""
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+
 class Log:
     """Logging class"""
     def __init__(self, app: Flask = None):
@@ -13,13 +51,18 @@ class Log:
         self.file_path = path.dirname(__file__)
         self.log_path = None
         self.logger = None
+        self.queue_handler = None
+        self.listener = None
+        self._process_hooks_registered = False
         if app is not None:
             self.init_app(app)
 
     def init_app(self, app: Flask):
-        """Configures the logger"""
+        """Configures the logger, in LOG_ASYNC mode records are written
+        to the file by listener thread through bounded queue"""
         self.log_path = path.join(self.file_path, f'logs/{app.name}.log')
         self.logger = logging.getLogger(app.name)
+        self.stop_listener()
         self.logger.handlers.clear()
         self.logger.setLevel(logging.INFO)
         f_handler = logging.FileHandler(self.log_path)
@@ -27,7 +70,49 @@ class Log:
         f_format = logging.Formatter('%(asctime)s - %(levelname)s - '
                                      '%(message)s', "%Y-%m-%d %H:%M:%S")
         f_handler.setFormatter(f_format)
-        self.logger.addHandler(f_handler)
+
+        if app.config.get('LOG_ASYNC'):
+            self.queue_handler = BoundedQueueHandler(Queue(app.config['LOG_QUEUE_SIZE']),
+                                                     app.config['LOG_QUEUE_POLICY'],
+                                                     app.config['LOG_QUEUE_BLOCK_TIMEOUT'])
+            self.listener = QueueListener(self.queue_handler.queue, f_handler,
+                                          respect_handler_level=True)
+            self.listener.start()
+            self.logger.addHandler(self.queue_handler)
+            self.register_process_hooks()
+        else:
+            self.queue_handler = None
+            self.logger.addHandler(f_handler)
+
+    def register_process_hooks(self):
+        """Registers stopping the listener on exit and restarting it in forked workers"""
+        if not self._process_hooks_registered:
+            atexit.register(self.stop_listener)
+            os.register_at_fork(after_in_child=self.restart_listener)
+            self._process_hooks_registered = True
+
+    def stop_listener(self):
+        """Writes queued records and stops the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def restart_listener(self):
+        """Starts new queue and listener thread in forked worker process,
+        threads and queue locks of the parent process are not usable there"""
+        if self.listener is None:
+            return
+        self.queue_handler.queue = Queue(self.queue_handler.queue.maxsize)
+        self.listener = QueueListener(self.queue_handler.queue, *self.listener.handlers,
+                                      respect_handler_level=True)
+        self.listener.start()
+
+    def stats(self) -> dict:
+        """Returns number of queued and dropped records"""
+        if self.queue_handler is None:
+            return {'async': False}
+        return {'async': True, 'queued': self.queue_handler.queue.qsize(),
+                'dropped': self.queue_handler.dropped}
 
     def clear_log(self):
         """Clears log file"""
@@ -1,10 +1,16 @@
 """Models package"""
 
 from .movie_genre import movie_genre
-from .director import Director, director_model, director_info_model
+from .table_version import TableVersion
+from .director import Director, director_model, director_info_model, \
+    director_numbered_page_model
 from .genre import Genre, genre_model
 from .country import Country, country_model
 from .age_restriction import AgeRestriction, age_restriction_model
 from .user import User, AnonymousUser, login_model, \
     register_model, user_info_model, password_change_model
-from .movie import Movie, movie_model_deserialize, movie_model_serialize
+from .movie import Movie, movie_model_deserialize, movie_model_serialize, \
+    movie_page_model, movie_numbered_page_model, movie_bulk_model, movie_bulk_change_model, \
+    movie_facets_model, MOVIE_LOAD_OPTIONS, CSV_EXPORT_HEADER, MOVIE_FILTER_NAMES
+from .movie_aggregate import MovieAggregate, analytics_group_model
+from .import_checkpoint import ImportCheckpoint
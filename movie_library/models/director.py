@@ -1,7 +1,7 @@
 """Director model module"""
 
 from flask_restx import fields
-from sqlalchemy import func
+from sqlalchemy import DDL, event
 from sqlalchemy.exc import NoResultFound
 
 from movie_library import db, api
@@ -18,6 +18,12 @@ director_info_model = api.model('DirectorInfo', {
     'first_name': fields.String(),
     'last_name': fields.String(),
 })
+director_numbered_page_model = api.model('DirectorNumberedPage', {
+    'items': fields.List(fields.Nested(director_model)),
+    'total': fields.Integer(),
+    'has_next': fields.Boolean(),
+    'next_page': fields.Integer(),
+})
 
 
 class Director(db.Model):
@@ -27,8 +33,15 @@ class Director(db.Model):
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     description = db.Column(db.Text)
+    full_name = db.Column(db.String(101), db.Computed('first_name || \' \' || last_name',
+                                                      persisted=True))
     movies = db.relationship('Movie', backref='director', lazy=True)
 
+    # trigram index serves substring ilike search on PostgreSQL
+    __table_args__ = (db.Index('ix_director_full_name_trgm', 'full_name',
+                               postgresql_using='gin',
+                               postgresql_ops={'full_name': 'gin_trgm_ops'}),)
+
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
@@ -36,13 +49,19 @@ class Director(db.Model):
         return f'<Director \'{self.id}.{self.first_name} {self.last_name}\'>'
 
     @classmethod
-    def get_directors_by(cls, params: dict) -> list:
-        """Returns searched, paginated directors"""
+    def get_directors_query(cls, params: dict):
+        """Returns query of searched directors"""
         director_query = cls.query
 
         if params.get('q'):
-            director_query = director_query.filter(func.concat(cls.first_name, ' ', cls.last_name).
-                                                   ilike(f'%{params["q"]}%'))
+            director_query = director_query.filter(cls.full_name.ilike(f'%{params["q"]}%'))
+
+        return director_query
+
+    @classmethod
+    def get_directors_by(cls, params: dict) -> list:
+        """Returns searched, paginated directors"""
+        director_query = cls.get_directors_query(params)
 
         offset = params['page_size'] * (params['page'] - 1)
         directors = director_query.offset(offset).limit(params['page_size']).all()
@@ -51,3 +70,28 @@ class Director(db.Model):
             raise NoResultFound('No directors found.')
 
         return directors
+
+    @classmethod
+    def get_query_key(cls, params: dict) -> tuple:
+        """Returns canonical key of director query parameters"""
+        from movie_library.utils import get_query_key
+
+        return get_query_key(cls, params, ('q',))
+
+    @classmethod
+    def get_directors_page_by(cls, params: dict) -> dict:
+        """Returns page of searched directors with total number of directors,
+        has_next flag and next page number"""
+        from movie_library.utils import get_filters_key, get_page_with_metadata
+
+        page = get_page_with_metadata(cls.get_directors_query(params), params,
+                                      get_filters_key(cls, params, ('q',)))
+
+        if not page['items']:
+            raise NoResultFound('No directors found.')
+
+        return page
+
+
+event.listen(Director.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
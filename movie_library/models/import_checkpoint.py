@@ -0,0 +1,47 @@
+"""Import checkpoint model module"""
+
+from datetime import datetime
+
+from sqlalchemy import update, insert, delete
+
+from movie_library import db
+
+
+class ImportCheckpoint(db.Model):
+    """Contains number of rows of the file committed by bulk import to the table,
+    it is saved in the transaction of each batch, so it always matches imported rows"""
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    file_path = db.Column(db.String(1024), primary_key=True)
+    committed_rows = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ImportCheckpoint \'{self.table_name}.{self.committed_rows}\'>'
+
+    @classmethod
+    def get_committed_rows(cls, table_name: str, file_path: str) -> int:
+        """Returns number of rows committed by previous import of the file to the table"""
+        committed_rows = db.session.query(cls.committed_rows). \
+            filter(cls.table_name == table_name, cls.file_path == file_path).scalar()
+        return committed_rows or 0
+
+    @classmethod
+    def save(cls, table_name: str, file_path: str, committed_rows: int):
+        """Sets number of committed rows in the current transaction,
+        the row of the first batch is inserted"""
+        now = datetime.utcnow()
+        result = db.session.execute(update(cls.__table__).
+                                    where(cls.table_name == table_name,
+                                          cls.file_path == file_path).
+                                    values(committed_rows=committed_rows, updated_at=now))
+        if not result.rowcount:
+            db.session.execute(insert(cls.__table__).
+                               values(table_name=table_name, file_path=file_path,
+                                      committed_rows=committed_rows, updated_at=now))
+
+    @classmethod
+    def forget(cls, table_name: str, file_path: str):
+        """Deletes checkpoint of the finished import in the current transaction"""
+        db.session.execute(delete(cls.__table__).
+                           where(cls.table_name == table_name, cls.file_path == file_path))
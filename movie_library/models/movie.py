@@ -1,20 +1,42 @@
 """Movie model module"""
 
 from datetime import datetime
-from typing import Union, List
+from typing import Tuple, Optional, Iterator, List, Dict
 
 from flask_restx import fields
-from sqlalchemy import func, or_, case
-from sqlalchemy.exc import NoResultFound
+from sqlalchemy import or_, and_, false, select, update, delete, func, distinct, \
+    extract, cast, tuple_, Integer
+from sqlalchemy.exc import NoResultFound, SQLAlchemyError
 
 from movie_library import db, api
-from movie_library.models import movie_genre, Director, Genre, director_info_model, \
-    genre_model, user_info_model, country_model, age_restriction_model
-from movie_library.utils import get_order_objects_list
+from movie_library.models import movie_genre, Director, Genre, Country, AgeRestriction, \
+    director_info_model, genre_model, user_info_model, country_model, age_restriction_model
+from movie_library.models.movie_search import register_search_ddl, filter_by_search, \
+    get_relevance_order
+from movie_library.utils import get_order_objects_list, get_sort_attrs_and_modes, \
+    get_keyset_order_objects_list, get_keyset_condition, get_keyset_values, \
+    parse_keyset_values, encode_cursor, decode_cursor, get_eager_load_options, \
+    get_cached_ids_by_titles, get_filters_key, get_page_with_metadata, commit_changes, \
+    get_ownership_condition, execute_changes, get_query_key, get_all_cached
 
 VALID_SORTING_VALUES = ('rating', 'release_date')
+CSV_EXPORT_HEADER = ('id', 'title', 'release_date', 'duration', 'rating', 'description',
+                     'preview', 'budget', 'user', 'country', 'age_restriction', 'director',
+                     'genres')
+RELEVANCE_SORTING_VALUE = 'relevance'
+DELETE_CHUNK_SIZE = 1000
+# columns grouped by catalog analytics, bulk updates of them are tracked
+AGGREGATED_COLUMNS = {'director_id', 'country_id', 'release_date', 'rating', 'budget'}
+MOVIE_FILTER_NAMES = ('q', 'search', 'release_date_range', 'directors', 'genres')
+UNORDERED_FILTER_NAMES = ('directors', 'genres')
 MIN_DATE = datetime.min
 MAX_DATE = datetime.max
+FACET_NAMES = ('genres', 'countries', 'age_restrictions', 'decades')
+FACET_MODELS = {'genres': Genre, 'countries': Country, 'age_restrictions': AgeRestriction}
+# GROUPING() bit masks of grouping sets made of one facet column and of the empty set
+FACET_GROUPINGS = {((1 << len(FACET_NAMES)) - 1) ^ (1 << (len(FACET_NAMES) - 1 - index)): index
+                   for index in range(len(FACET_NAMES))}
+TOTAL_GROUPING = (1 << len(FACET_NAMES)) - 1
 
 movie_base_model = api.model('MovieBase', {
     'title': fields.String(),
@@ -39,6 +61,46 @@ movie_model_serialize = api.clone('MovieSerialize', movie_base_model, {
     'director_id': fields.Integer(default=1),
     'genres': fields.List(fields.Integer(default=1)),
 })
+movie_page_model = api.model('MoviePage', {
+    'items': fields.List(fields.Nested(movie_model_deserialize)),
+    'next_cursor': fields.String(),
+})
+movie_bulk_result_model = api.model('MovieBulkResult', {
+    'index': fields.Integer(),
+    'status': fields.Integer(),
+    'id': fields.Integer(),
+    'errors': fields.Raw(),
+})
+movie_bulk_model = api.model('MovieBulk', {
+    'created': fields.Integer(),
+    'failed': fields.Integer(),
+    'results': fields.List(fields.Nested(movie_bulk_result_model)),
+})
+movie_bulk_change_model = api.model('MovieBulkChange', {
+    'affected': fields.Integer(),
+})
+facet_value_model = api.model('FacetValue', {
+    'id': fields.Integer(),
+    'title': fields.String(),
+    'count': fields.Integer(),
+})
+decade_facet_value_model = api.model('DecadeFacetValue', {
+    'decade': fields.Integer(),
+    'count': fields.Integer(),
+})
+movie_facets_model = api.model('MovieFacets', {
+    'total': fields.Integer(),
+    'genres': fields.List(fields.Nested(facet_value_model)),
+    'countries': fields.List(fields.Nested(facet_value_model)),
+    'age_restrictions': fields.List(fields.Nested(facet_value_model)),
+    'decades': fields.List(fields.Nested(decade_facet_value_model)),
+})
+movie_numbered_page_model = api.model('MovieNumberedPage', {
+    'items': fields.List(fields.Nested(movie_model_deserialize)),
+    'total': fields.Integer(),
+    'has_next': fields.Boolean(),
+    'next_page': fields.Integer(),
+})
 
 
 class Movie(db.Model):
@@ -66,18 +128,14 @@ class Movie(db.Model):
         return f'<Movie \'{self.id}.{self.title}\'>'
 
     @classmethod
-    def get_movies_by(cls, params: dict) -> list:
-        """Returns searched, paginated, sorted and filtered movies"""
-        movie_query = cls.query
-
-        if params.get('sort'):
-            sort_data = params['sort'].split(';')
-            order_by = get_order_objects_list(sort_data, cls, VALID_SORTING_VALUES)
-            movie_query = movie_query.order_by(*order_by)
-
+    def filter_movies_query(cls, movie_query, params: dict):
+        """Applies search and filter query parameters to movie query"""
         if params.get('q'):
             movie_query = movie_query.filter(cls.title.ilike(f'%{params["q"]}%'))
 
+        if params.get('search'):
+            movie_query = filter_by_search(movie_query, cls.id, params['search'])
+
         if params.get('release_date_range'):
             date_range = params['release_date_range'].split(',')
 
@@ -90,20 +148,56 @@ class Movie(db.Model):
 
         if params.get('directors'):
             directors = params['directors'].split(',')
-            directors_conditions = [func.concat(Director.first_name, ' ',
-                                                Director.last_name).ilike(f'%{director}%')
+            directors_conditions = [Director.full_name.ilike(f'%{director}%')
                                     for director in directors]
-            movie_query = movie_query.join(Movie.director).filter(or_(*directors_conditions))
+            movie_query = movie_query.filter(
+                cls.director_id.in_(select(Director.id).where(or_(*directors_conditions))))
 
         if params.get('genres'):
-            genres = params['genres'].split(',')
-            genres = list(map(str.lower, genres))
-            movie_query = movie_query. \
-                join(movie_genre, Movie.id == movie_genre.c.movie_id). \
-                join(Genre, movie_genre.c.genre_id == Genre.id). \
-                group_by(Movie.id). \
-                having(func.sum(case((func.lower(Genre.title).
-                                      in_(genres), 1), else_=0)) == len(genres))
+            genres = set(map(str.lower, params['genres'].split(',')))
+            genres_ids = get_cached_ids_by_titles(Genre, genres)
+            if len(genres_ids) < len(genres):
+                return movie_query.filter(false())
+
+            # relational division: every genre is a separate semi-join
+            # served by (genre_id, movie_id) index of movie_genre
+            for genre_id in genres_ids:
+                movie_query = movie_query.filter(
+                    cls.id.in_(select(movie_genre.c.movie_id).
+                               where(movie_genre.c.genre_id == genre_id)))
+
+        return movie_query
+
+    @classmethod
+    def get_order_objects_list(cls, params: dict) -> list:
+        """Gets order objects from sort parameter including sorting by search relevance"""
+        order_by = []
+        for sort_value in params['sort'].split(';'):
+            if sort_value.split(',')[0] != RELEVANCE_SORTING_VALUE:
+                order_by.extend(get_order_objects_list([sort_value], cls, VALID_SORTING_VALUES))
+            elif sort_value != RELEVANCE_SORTING_VALUE:
+                raise ValueError(f'Incorrect input: sort parameter \'{sort_value}\'. '
+                                 f'Sorting by relevance has no sorting mode.')
+            elif not params.get('search'):
+                raise ValueError('Sorting by relevance requires search parameter.')
+            else:
+                order_by.append(get_relevance_order(params['search']))
+        return order_by
+
+    @classmethod
+    def get_movies_query(cls, params: dict):
+        """Returns query of searched, sorted and filtered movies"""
+        movie_query = cls.query.options(*MOVIE_LOAD_OPTIONS)
+
+        if params.get('sort'):
+            movie_query = movie_query.order_by(*cls.get_order_objects_list(params))
+
+        return cls.filter_movies_query(movie_query, params)
+
+    @classmethod
+    def get_movies_by(cls, params: dict) -> list:
+        """Returns searched, paginated, sorted and filtered movies"""
+        movie_query = cls.get_movies_query(params)
 
         offset = params['page_size'] * (params['page'] - 1)
         movies = movie_query.offset(offset).limit(params['page_size']).all()
@@ -113,21 +207,229 @@ class Movie(db.Model):
 
         return movies
 
+    @classmethod
+    def get_query_key(cls, params: dict) -> tuple:
+        """Returns canonical key of movie query parameters"""
+        return get_query_key(cls, params, MOVIE_FILTER_NAMES, UNORDERED_FILTER_NAMES)
+
+    @classmethod
+    def get_movies_page_by(cls, params: dict) -> dict:
+        """Returns page of searched, sorted and filtered movies with total number
+        of movies, has_next flag and next page number"""
+        page = get_page_with_metadata(cls.get_movies_query(params), params,
+                                      get_filters_key(cls, params, MOVIE_FILTER_NAMES,
+                                                      UNORDERED_FILTER_NAMES))
+
+        if not page['items']:
+            raise NoResultFound('No movies found.')
+
+        return page
+
+    @classmethod
+    def get_facets_key(cls, params: dict) -> tuple:
+        """Returns canonical key of movie filter parameters of facets"""
+        return ('facets', *get_filters_key(cls, params, MOVIE_FILTER_NAMES,
+                                           UNORDERED_FILTER_NAMES))
+
+    @classmethod
+    def count_facets(cls, params: dict) -> Tuple[int, Dict[str, Dict[int, int]]]:
+        """Counts filtered movies and their numbers per facet value in a single pass,
+        by grouping sets on PostgreSQL, other databases return filtered movies joined
+        with their genres, which are counted here"""
+        decade = cast(extract('year', cls.release_date), Integer) / 10 * 10
+        movies = cls.filter_movies_query(
+            db.session.query(cls.id, cls.country_id, cls.age_restriction_id,
+                             decade.label('decade')), params).subquery()
+        facet_columns = (movie_genre.c.genre_id, movies.c.country_id,
+                         movies.c.age_restriction_id, movies.c.decade)
+        movies_with_genres = movies.outerjoin(movie_genre,
+                                              movie_genre.c.movie_id == movies.c.id)
+        counts = {name: {} for name in FACET_NAMES}
+
+        if db.engine.dialect.name == 'postgresql':
+            statement = select(func.grouping(*facet_columns), *facet_columns,
+                               func.count(distinct(movies.c.id))). \
+                select_from(movies_with_genres). \
+                group_by(func.grouping_sets(*facet_columns, tuple_()))
+            total = 0
+            for grouping, *values, count in db.session.execute(statement):
+                if grouping == TOTAL_GROUPING:
+                    total = count
+                    continue
+                index = FACET_GROUPINGS[grouping]
+                if values[index] is not None:
+                    counts[FACET_NAMES[index]][values[index]] = count
+            return total, counts
+
+        movie_ids = set()
+        statement = select(movies.c.id, *facet_columns).select_from(movies_with_genres)
+        for movie_id, genre_id, *values in db.session.execute(statement):
+            if genre_id is not None:
+                counts['genres'][genre_id] = counts['genres'].get(genre_id, 0) + 1
+            if movie_id in movie_ids:
+                continue
+            movie_ids.add(movie_id)
+            for name, value in zip(FACET_NAMES[1:], values):
+                if value is not None:
+                    counts[name][value] = counts[name].get(value, 0) + 1
+        return len(movie_ids), counts
+
+    @classmethod
+    def get_facets_by(cls, params: dict) -> dict:
+        """Returns number of filtered movies and their numbers per genre, country,
+        age restriction and release decade, the most frequent values go first"""
+        total, counts = cls.count_facets(params)
+        facets = {'total': total}
+        for name, model_cls in FACET_MODELS.items():
+            titles = {object_['id']: object_['title'] for object_ in get_all_cached(model_cls)}
+            facets[name] = [{'id': id_, 'title': titles.get(id_), 'count': count}
+                            for id_, count in sorted(counts[name].items(),
+                                                     key=lambda item: (-item[1], item[0]))]
+        facets['decades'] = [{'decade': decade, 'count': count}
+                             for decade, count in sorted(counts['decades'].items())]
+        return facets
+
+    @classmethod
+    def get_movies_page_by_cursor(cls, params: dict) -> Tuple[list, Optional[str]]:
+        """Returns searched, sorted and filtered movies placed after the cursor
+        and the cursor of the next page (keyset pagination)"""
+        sort = params.get('sort') or ''
+        sort_data = sort.split(';') if sort else []
+        if RELEVANCE_SORTING_VALUE in sort_data:
+            raise ValueError('Sorting by relevance is not supported in cursor mode.')
+        sort_attrs_and_modes = get_sort_attrs_and_modes(sort_data, VALID_SORTING_VALUES)
+        sort_attrs_and_modes.append(('id', 'asc'))
+
+        movie_query = cls.query.options(*MOVIE_LOAD_OPTIONS). \
+            order_by(*get_keyset_order_objects_list(cls, sort_attrs_and_modes))
+        movie_query = cls.filter_movies_query(movie_query, params)
+
+        if params.get('cursor'):
+            cursor_data = decode_cursor(params['cursor'])
+            if cursor_data.get('sort') != sort:
+                raise ValueError('Parameter cursor does not match the sort parameter.')
+            values = parse_keyset_values(cls, sort_attrs_and_modes, cursor_data.get('values'))
+            movie_query = movie_query.filter(get_keyset_condition(cls, sort_attrs_and_modes,
+                                                                  values))
+
+        movies = movie_query.limit(params['page_size'] + 1).all()
+
+        if not movies:
+            raise NoResultFound('No movies found.')
+
+        next_cursor = None
+        if len(movies) > params['page_size']:
+            movies = movies[:params['page_size']]
+            next_cursor = encode_cursor({
+                'sort': sort,
+                'values': get_keyset_values(movies[-1], sort_attrs_and_modes),
+            })
+
+        return movies, next_cursor
+
+    @classmethod
+    def iterate_all(cls, chunk_size: int) -> Iterator['Movie']:
+        """Yields all movies by server-side cursor in chunks,
+        nested objects are loaded by one query per chunk"""
+        return cls.query.options(*MOVIE_LOAD_OPTIONS).order_by(cls.id). \
+            execution_options(stream_results=True).yield_per(chunk_size)
+
+    @classmethod
+    def add_many(cls, movies: List[Tuple[int, 'Movie', list]],
+                 chunk_size: int) -> Tuple[Dict[int, int], Dict[int, dict]]:
+        """Adds movies with their genres by chunks, every chunk in one transaction,
+        returns ids of added movies and errors of not added chunks by item indexes"""
+        ids, errors = {}, {}
+        for start in range(0, len(movies), chunk_size):
+            chunk = movies[start:start + chunk_size]
+            try:
+                for _, movie, genres in chunk:
+                    movie.genres = genres
+                    db.session.add(movie)
+                db.session.flush()
+                chunk_ids = {index: movie.id for index, movie, _ in chunk}
+                commit_changes()
+            except SQLAlchemyError as error:
+                db.session.rollback()
+                for index, _, _ in chunk:
+                    errors[index] = {'_database': [f'The chunk was not saved: '
+                                                   f'{error.__class__.__name__}.']}
+            else:
+                ids.update(chunk_ids)
+        return ids, errors
+
+    @classmethod
+    def get_bulk_condition(cls, selection: dict):
+        """Gets SQL condition selecting movies of current user (all movies for admin)
+        by ids or by filter of movies list"""
+        if 'ids' in selection:
+            condition = cls.id.in_(selection['ids'])
+        else:
+            id_query = cls.filter_movies_query(db.session.query(cls.id), selection['filter'])
+            condition = cls.id.in_(id_query.statement.correlate(None))
+        return and_(condition, get_ownership_condition(cls))
+
+    @classmethod
+    def update_many(cls, selection: dict, values: dict) -> int:
+        """Updates selected movies by one statement and returns number of them,
+        movies are locked and tracked for analytics when aggregated columns change"""
+        if AGGREGATED_COLUMNS.intersection(values):
+            from movie_library.analytics import track_movies
+            track_movies(id_ for id_, in db.session.execute(
+                select(cls.id).where(cls.get_bulk_condition(selection)).
+                with_for_update(of=cls.__table__)))
+        statement = update(cls.__table__).where(cls.get_bulk_condition(selection)). \
+            values(**values)
+        return execute_changes([cls.__tablename__], statement)[0]
+
+    @classmethod
+    def delete_many(cls, selection: dict) -> int:
+        """Deletes selected movies with their genres links in one transaction and returns
+        number of deleted movies, ids are selected first because genres filter
+        depends on the links deleted before movies, selected rows are locked
+        against new links until commit"""
+        ids = [id_ for id_, in db.session.execute(select(cls.id).
+                                                  where(cls.get_bulk_condition(selection)).
+                                                  with_for_update(of=cls.__table__))]
+        from movie_library.analytics import track_movies
+        track_movies(ids)
+        statements = []
+        for start in range(0, len(ids), DELETE_CHUNK_SIZE):
+            ids_chunk = ids[start:start + DELETE_CHUNK_SIZE]
+            statements.append(delete(movie_genre).where(movie_genre.c.movie_id.in_(ids_chunk)))
+            statements.append(delete(cls.__table__).where(cls.id.in_(ids_chunk)))
+        return sum(execute_changes([cls.__tablename__, movie_genre.name], *statements)[1::2])
+
+    @staticmethod
+    def get_csv_export_row(movie_data: dict) -> list:
+        """Flattens marshalled movie to CSV row, nested objects are replaced by their titles"""
+        row = [movie_data[key] for key in CSV_EXPORT_HEADER[:8]]
+        row.append(movie_data['user'] and movie_data['user']['username'])
+        row.append(movie_data['country'] and movie_data['country']['title'])
+        row.append(movie_data['age_restriction'] and movie_data['age_restriction']['title'])
+        director = movie_data['director']
+        row.append(f'{director["first_name"]} {director["last_name"]}'
+                   if isinstance(director, dict) else director)
+        row.append('|'.join(genre['title'] for genre in movie_data['genres']))
+        return row
+
     @staticmethod
-    def cut_genres_ids_from_request_json(request_json: dict) -> Union[list, None]:
-        """Cuts genres_ids from request.json if exist else return None"""
-        genres_ids = None
+    def cut_genres_from_request_json(request_json: dict) -> Tuple[Optional[list],
+                                                                  Optional[list]]:
+        """Cuts genres ids from request.json and loads genres by them if exist
+        else returns None instead of both"""
+        genres_ids, genres = None, None
         if 'genres' in request_json:
             genres = request_json.get('genres')
             genres_ids = genres if genres is not None else []
 
             from movie_library.schemes import MovieSchema
-            MovieSchema.validate_genres_ids(genres_ids)
+            genres = MovieSchema.load_genres_by_ids(genres_ids)
 
             del request_json['genres']
-        return genres_ids
+        return genres_ids, genres
 
-    @staticmethod
-    def get_genres_by_genres_ids(genres_ids: List[int]) -> list:
-        """Returns genres by genres_ids if genres_ids else []"""
-        return Genre.query.filter(Genre.id.in_(genres_ids)).all() if genres_ids else []
+
+MOVIE_LOAD_OPTIONS = get_eager_load_options(Movie, movie_model_deserialize)
+
+register_search_ddl(Movie.__table__)
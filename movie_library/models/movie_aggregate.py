@@ -0,0 +1,116 @@
+"""Movie aggregate model module"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from flask_restx import fields
+from sqlalchemy import select, delete, func, literal, cast, extract, Integer, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from movie_library import db, api
+from movie_library.models import Movie, Genre, Director, Country, movie_genre
+
+# sums kept by aggregate rows, changes of movies are added to them as deltas
+SUM_COLUMN_NAMES = ('movie_count', 'rated_count', 'rating_sum', 'budget_count', 'budget_sum')
+# dimensions by names used in urls with columns of group titles
+DIMENSIONS = {'genres': ('genre', Genre.title), 'directors': ('director', Director.full_name),
+              'countries': ('country', Country.title), 'years': ('year', None)}
+
+analytics_group_model = api.model('AnalyticsGroup', {
+    'id': fields.Integer(),
+    'title': fields.String(),
+    'movie_count': fields.Integer(),
+    'average_rating': fields.Float(),
+    'total_budget': fields.Float(),
+})
+
+
+class MovieAggregate(db.Model):
+    """Contains number of movies and sums of their ratings and budgets per genre, director,
+    country or release year, the sums are changed in transactions which change movies"""
+
+    dimension = db.Column(db.String(16), primary_key=True)
+    group_id = db.Column(db.Integer, primary_key=True)
+    movie_count = db.Column(db.Integer, nullable=False, default=0)
+    rated_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    budget_count = db.Column(db.Integer, nullable=False, default=0)
+    budget_sum = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<MovieAggregate \'{self.dimension}.{self.group_id}\'>'
+
+    @classmethod
+    def get_groups(cls, dimension_name: str) -> List[dict]:
+        """Returns groups of the dimension with number of movies, average rating
+        and total budget, biggest groups go first, movies are not read"""
+        dimension, title_column = DIMENSIONS[dimension_name]
+        title = title_column if title_column is not None else cast(cls.group_id, db.String)
+        statement = select(cls.group_id, title.label('title'),
+                           *(getattr(cls, column_name) for column_name in SUM_COLUMN_NAMES)). \
+            where(cls.dimension == dimension, cls.movie_count > 0). \
+            order_by(cls.movie_count.desc(), cls.group_id)
+        if title_column is not None:
+            statement = statement.join(title_column.class_,
+                                       title_column.class_.id == cls.group_id)
+
+        return [{'id': group_id, 'title': title, 'movie_count': movie_count,
+                 'average_rating': rating_sum / rated_count if rated_count else None,
+                 'total_budget': budget_sum if budget_count else None}
+                for group_id, title, movie_count, rated_count, rating_sum, budget_count, budget_sum
+                in db.session.execute(statement)]
+
+    @classmethod
+    def apply_deltas(cls, deltas: Dict[Tuple[str, int], list]):
+        """Adds changes of sums to aggregate rows in the current transaction,
+        missing rows are inserted and changed rows left without movies are deleted"""
+        rows = [{'dimension': dimension, 'group_id': group_id,
+                 **dict(zip(SUM_COLUMN_NAMES, sums))}
+                for (dimension, group_id), sums in sorted(deltas.items()) if any(sums)]
+        if not rows:
+            return
+
+        insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+        statement = insert(cls.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=[cls.dimension, cls.group_id],
+            set_={column_name: getattr(cls, column_name) + statement.excluded[column_name]
+                  for column_name in SUM_COLUMN_NAMES})
+        db.session.execute(statement, rows)
+
+        group_ids = {}
+        for row in rows:
+            group_ids.setdefault(row['dimension'], []).append(row['group_id'])
+        db.session.execute(delete(cls.__table__).where(
+            or_(*(and_(cls.dimension == dimension, cls.group_id.in_(ids))
+                  for dimension, ids in group_ids.items())),
+            cls.movie_count <= 0))
+
+    @classmethod
+    def delete_groups(cls, groups: Iterable[Tuple[str, int]]):
+        """Deletes aggregate rows of groups which genre, director or country was deleted"""
+        for dimension, group_id in groups:
+            db.session.execute(delete(cls.__table__).
+                               where(cls.dimension == dimension, cls.group_id == group_id))
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """Recomputes all aggregate rows from movies in the current transaction
+        and returns number of groups"""
+        movie = Movie.__table__
+        sums = (func.count(), func.count(movie.c.rating),
+                func.coalesce(func.sum(movie.c.rating), Decimal(0)),
+                func.count(movie.c.budget), func.coalesce(func.sum(movie.c.budget), 0.0))
+        group_columns = {'genre': movie_genre.c.genre_id, 'director': movie.c.director_id,
+                         'country': movie.c.country_id,
+                         'year': cast(extract('year', movie.c.release_date), Integer)}
+
+        db.session.execute(delete(cls.__table__))
+        for dimension, group_column in group_columns.items():
+            from_clause = movie.join(movie_genre, movie_genre.c.movie_id == movie.c.id) \
+                if dimension == 'genre' else movie
+            groups = select(literal(dimension), group_column, *sums). \
+                select_from(from_clause).where(group_column.isnot(None)).group_by(group_column)
+            db.session.execute(cls.__table__.insert().
+                               from_select(['dimension', 'group_id', *SUM_COLUMN_NAMES], groups))
+        return db.session.query(cls).count()
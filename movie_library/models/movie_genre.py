@@ -7,4 +7,5 @@ movie_genre = db.Table('movie_genre',
                        db.Column('movie_id', db.Integer,
                                  db.ForeignKey('movie.id'), primary_key=True),
                        db.Column('genre_id', db.Integer,
-                                 db.ForeignKey('genre.id'), primary_key=True))
+                                 db.ForeignKey('genre.id'), primary_key=True),
+                       db.Index('ix_movie_genre_genre_id_movie_id', 'genre_id', 'movie_id'))
@@ -0,0 +1,84 @@
+"""Movie full-text search module"""
+
+from re import findall
+from typing import List
+
+from sqlalchemy import DDL, event, func, literal_column, table, column
+
+from movie_library import db
+
+TEXT_SEARCH_CONFIG = 'english'
+
+movie_fts = table('movie_fts', column('rowid'), column('rank'))
+
+# PostgreSQL: weighted tsvector generated column covered by GIN index
+POSTGRESQL_CREATE_DDL = (
+    f'ALTER TABLE movie ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ('
+    f'setweight(to_tsvector(\'{TEXT_SEARCH_CONFIG}\', coalesce(title, \'\')), \'A\') || '
+    f'setweight(to_tsvector(\'{TEXT_SEARCH_CONFIG}\', coalesce(description, \'\')), \'B\')'
+    f') STORED',
+    'CREATE INDEX ix_movie_search_vector ON movie USING gin (search_vector)',
+)
+# SQLite: external content FTS5 table kept in sync with the movie table by triggers
+SQLITE_CREATE_DDL = (
+    'CREATE VIRTUAL TABLE movie_fts USING fts5(title, description, '
+    'content=\'movie\', content_rowid=\'id\')',
+    'CREATE TRIGGER movie_fts_after_insert AFTER INSERT ON movie BEGIN '
+    'INSERT INTO movie_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER movie_fts_after_delete AFTER DELETE ON movie BEGIN '
+    'INSERT INTO movie_fts(movie_fts, rowid, title, description) '
+    'VALUES (\'delete\', old.id, old.title, old.description); END',
+    'CREATE TRIGGER movie_fts_after_update AFTER UPDATE ON movie BEGIN '
+    'INSERT INTO movie_fts(movie_fts, rowid, title, description) '
+    'VALUES (\'delete\', old.id, old.title, old.description); '
+    'INSERT INTO movie_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+)
+SQLITE_DROP_DDL = (
+    'DROP TABLE IF EXISTS movie_fts',
+)
+
+
+def register_search_ddl(movie_table: db.Table):
+    """Creates search schema objects together with the movie table"""
+    for statement in POSTGRESQL_CREATE_DDL:
+        event.listen(movie_table, 'after_create',
+                     DDL(statement).execute_if(dialect='postgresql'))
+    for statement in SQLITE_CREATE_DDL:
+        event.listen(movie_table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    for statement in SQLITE_DROP_DDL:
+        event.listen(movie_table, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+
+
+def get_search_terms(search: str) -> List[str]:
+    """Splits search string to lower case words"""
+    terms = findall(r'\w+', search.lower())
+    if not terms:
+        raise ValueError('Parameter search must contain at least one word.')
+    return terms
+
+
+def filter_by_search(movie_query, movie_id_column, search: str):
+    """Filters movie query by title and description words (prefix match, AND)"""
+    terms = get_search_terms(search)
+
+    if db.engine.dialect.name == 'postgresql':
+        ts_query = func.to_tsquery(TEXT_SEARCH_CONFIG, ' & '.join(f'{term}:*' for term in terms))
+        return movie_query.filter(literal_column('movie.search_vector').op('@@')(ts_query))
+
+    fts_query = ' '.join(f'"{term}"*' for term in terms)
+    return movie_query.join(movie_fts, movie_fts.c.rowid == movie_id_column). \
+        filter(literal_column('movie_fts').op('MATCH')(fts_query))
+
+
+def get_relevance_order(search: str):
+    """Gets order object sorting query filtered by search from the most relevant movie"""
+    terms = get_search_terms(search)
+
+    if db.engine.dialect.name == 'postgresql':
+        ts_query = func.to_tsquery(TEXT_SEARCH_CONFIG, ' & '.join(f'{term}:*' for term in terms))
+        return func.ts_rank_cd(literal_column('movie.search_vector'), ts_query).desc()
+
+    # fts5 rank is bm25 score, where better matches have smaller values
+    return movie_fts.c.rank
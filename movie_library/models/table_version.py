@@ -0,0 +1,55 @@
+"""Table version model module"""
+
+from datetime import datetime
+from typing import Iterable, Dict, Tuple
+
+from sqlalchemy import event, update, insert
+
+from movie_library import db
+
+
+class TableVersion(db.Model):
+    """Contains version counter and modification time of the table,
+    the version is bumped in the transaction which changes the table"""
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TableVersion \'{self.table_name}.{self.version}\'>'
+
+    @classmethod
+    def get_versions(cls, table_names: Iterable[str]) -> Dict[str, Tuple[int, datetime]]:
+        """Returns versions and modification times of tables by their names"""
+        rows = db.session.query(cls.table_name, cls.version, cls.updated_at). \
+            filter(cls.table_name.in_(table_names)).all()
+        return {table_name: (version, updated_at) for table_name, version, updated_at in rows}
+
+    @classmethod
+    def bump(cls, table_names: Iterable[str]):
+        """Increments versions of tables in the current transaction,
+        rows of tables which have no version yet are inserted"""
+        table_names = sorted(set(table_names))
+        if not table_names:
+            return
+
+        now = datetime.utcnow()
+        result = db.session.execute(update(cls.__table__).
+                                    where(cls.table_name.in_(table_names)).
+                                    values(version=cls.version + 1, updated_at=now))
+        if result.rowcount < len(table_names):
+            missing_names = set(table_names) - set(cls.get_versions(table_names))
+            db.session.execute(insert(cls.__table__),
+                               [{'table_name': table_name, 'version': 1, 'updated_at': now}
+                                for table_name in sorted(missing_names)])
+
+
+@event.listens_for(TableVersion.__table__, 'after_create')
+def insert_table_versions(target: db.Table, connection, **kwargs):
+    """Creates first versions of all application tables"""
+    now = datetime.utcnow()
+    connection.execute(target.insert(), [{'table_name': table_name, 'version': 1,
+                                          'updated_at': now}
+                                         for table_name in sorted(target.metadata.tables)
+                                         if table_name != target.name])
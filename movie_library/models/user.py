@@ -2,8 +2,10 @@
 
 from datetime import datetime
 
+from flask import current_app
 from flask_restx import fields
 from flask_login import UserMixin, AnonymousUserMixin
+from sqlalchemy.orm import make_transient_to_detached
 
 from movie_library import db, login_manager, api
 
@@ -60,6 +62,15 @@ class User(db.Model, UserMixin):
     def __repr__(self):
         return f'<{"Admin" if self.is_admin else "User"} \'{self.id}.{self.username}\'>'
 
+    @classmethod
+    def from_column_values(cls, column_values: dict) -> 'User':
+        """Makes persistent user from column values without database query"""
+        user = cls.__mapper__.class_manager.new_instance()
+        for key, value in column_values.items():
+            setattr(user, key, value)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
 
 class AnonymousUser(AnonymousUserMixin):
     """Flask-login anonymous user with overridden __repr__ method"""
@@ -69,5 +80,16 @@ class AnonymousUser(AnonymousUserMixin):
 
 @login_manager.user_loader
 def load_user(user_id: int) -> User:
-    """Gets user by user_id"""
-    return User.query.get(user_id)
+    """Gets user by user_id from per-worker user cache or from database on cache miss,
+    the cache entry is invalidated when the user is changed by write helpers"""
+    from movie_library.utils import user_cache, get_column_values
+
+    user_id = int(user_id)
+    column_values = user_cache.get(user_id)
+    if column_values is not None:
+        return User.from_column_values(column_values)
+
+    user = User.query.get(user_id)
+    if user is not None:
+        user_cache.set(user_id, get_column_values(user), current_app.config['USER_CACHE_TTL'])
+    return user
@@ -0,0 +1,85 @@
+"""Connection pool metrics module"""
+
+from threading import Lock
+from time import monotonic
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+CHECKOUT_TIME_KEY = 'checkout_time'
+
+
+class PoolMetrics:
+    """Counts connection pool events of the application engine
+    and measures how long connections are held by requests"""
+
+    def __init__(self, app: Flask = None, db: SQLAlchemy = None):
+        """Constructor takes application and its database extension"""
+        self.pool = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.max_checked_out = 0
+        self.total_hold_time = 0.0
+        self.max_hold_time = 0.0
+        self._checked_out = 0
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app: Flask, db: SQLAlchemy):
+        """Listens to pool events of the application engine"""
+        with app.app_context():
+            self.pool = db.engine.pool
+        event.listen(self.pool, 'connect', self.on_connect)
+        event.listen(self.pool, 'checkout', self.on_checkout)
+        event.listen(self.pool, 'checkin', self.on_checkin)
+        event.listen(self.pool, 'invalidate', self.on_invalidate)
+
+    def on_connect(self, dbapi_connection, connection_record):
+        """Counts new database connections"""
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        """Counts checkouts and remembers checkout time"""
+        connection_record.info[CHECKOUT_TIME_KEY] = monotonic()
+        with self._lock:
+            self.checkouts += 1
+            self._checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self._checked_out)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        """Counts checkins and measures time the connection was held"""
+        checkout_time = connection_record.info.pop(CHECKOUT_TIME_KEY, None)
+        if checkout_time is None:
+            return
+        hold_time = monotonic() - checkout_time
+        with self._lock:
+            self.checkins += 1
+            self._checked_out -= 1
+            self.total_hold_time += hold_time
+            self.max_hold_time = max(self.max_hold_time, hold_time)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        """Counts connections invalidated by failed pre-ping or disconnect errors"""
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Returns pool event counters, connection hold times in milliseconds
+        and current queue pool state"""
+        with self._lock:
+            stats = {'connects': self.connects, 'checkouts': self.checkouts,
+                     'checked_out': self._checked_out, 'max_checked_out': self.max_checked_out,
+                     'invalidations': self.invalidations,
+                     'avg_hold_ms': self.total_hold_time / self.checkins * 1000
+                     if self.checkins else None,
+                     'max_hold_ms': self.max_hold_time * 1000}
+        if isinstance(self.pool, QueuePool):
+            stats.update(size=self.pool.size(), overflow=self.pool.overflow(),
+                         idle=self.pool.checkedin(), timeout=self.pool.timeout())
+        return stats
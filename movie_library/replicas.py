@@ -0,0 +1,100 @@
+"""Read replica routing module"""
+
+from functools import wraps
+from itertools import cycle
+from threading import Lock
+from time import time
+from typing import Callable, Optional
+
+from flask import Flask, g, has_request_context, session
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import create_engine, orm
+from sqlalchemy.engine import Engine
+
+REPLICA_ENGINE_KEY = 'replica_engine'
+LAST_WRITE_KEY = '_last_write_time'
+
+
+def is_write_clause(clause) -> bool:
+    """Checks clause changes data or locks rows, such clauses must go to the primary"""
+    return clause is not None and (getattr(clause, 'is_dml', False) or
+                                   getattr(clause, '_for_update_arg', None) is not None)
+
+
+class RoutingSession(SignallingSession):
+    """Session which sends queries of read-only handlers to the replica engine
+    chosen for the request, flushes and writing clauses go to the primary"""
+
+    def get_bind(self, mapper=None, clause=None):
+        """Returns replica engine of the request for reading clauses"""
+        engine = g.get(REPLICA_ENGINE_KEY) if has_request_context() else None
+        if engine is not None and not self._flushing and not is_write_clause(clause):
+            return engine
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """SQLAlchemy extension creating routing sessions"""
+
+    def create_session(self, options):
+        """Creates factory of routing sessions"""
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class ReplicaRouter:
+    """Chooses read replica engines in turn for read-only handlers, clients which
+    have written within DB_READ_YOUR_WRITES_WINDOW seconds keep reading from the primary"""
+
+    def __init__(self, app: Flask = None):
+        """Constructor takes application"""
+        self.engines = []
+        self.window = 0.0
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self._engine_cycle = None
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Creates replica engines with the same options as the primary engine"""
+        engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        self.engines = [create_engine(uri, **engine_options)
+                        for uri in app.config['DB_REPLICA_URIS']]
+        self.window = app.config['DB_READ_YOUR_WRITES_WINDOW']
+        self._engine_cycle = cycle(self.engines)
+
+    def choose_engine(self) -> Optional[Engine]:
+        """Returns the next replica engine or None when the client has written recently"""
+        if not self.engines:
+            return None
+        last_write_time = session.get(LAST_WRITE_KEY)
+        with self._lock:
+            if last_write_time is not None and time() - last_write_time < self.window:
+                self.primary_reads += 1
+                return None
+            self.replica_reads += 1
+            return next(self._engine_cycle)
+
+    def record_write(self):
+        """Remembers write time of the client in its session cookie"""
+        if self.engines and self.window > 0 and has_request_context():
+            session[LAST_WRITE_KEY] = time()
+
+    def read_only(self, func: Callable) -> Callable:
+        """Decorator routing queries of the handler to a read replica"""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            previous_engine = g.get(REPLICA_ENGINE_KEY)
+            setattr(g, REPLICA_ENGINE_KEY, self.choose_engine())
+            try:
+                return func(*args, **kwargs)
+            finally:
+                setattr(g, REPLICA_ENGINE_KEY, previous_engine)
+        return wrapper
+
+    def stats(self) -> dict:
+        """Returns number of replicas and reads routed to replicas or kept on the primary"""
+        with self._lock:
+            return {'replicas': len(self.engines), 'replica_reads': self.replica_reads,
+                    'primary_reads': self.primary_reads}
@@ -0,0 +1,321 @@
+"""Shared response cache module"""
+
+import os
+import sqlite3
+from collections import OrderedDict
+from hashlib import sha1
+from threading import Lock, Thread, local
+from time import monotonic, sleep, time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from flask import Flask, Response
+
+RESPONSE_MIMETYPE = 'application/json'
+# refresh function of hot key returns key parts with current table versions
+# and function making the response for them
+Refresh = Callable[[], Tuple[Hashable, Callable[[], Response]]]
+SQLITE_PURGE_INTERVAL = 100
+
+
+class MemoryBackend:
+    """In-process backend, entries are shared by threads of one worker only"""
+
+    def __init__(self, maxsize: int = 1000):
+        """Constructor takes maximum number of entries"""
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Gets not expired value by key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        """Sets value by key for ttl seconds, the least recently used entry is evicted"""
+        with self._lock:
+            self._entries[key] = (value, monotonic() + ttl)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """SQLite file backend shared by workers of one host"""
+
+    def __init__(self, file_path: str):
+        """Constructor takes path of the database file, the table is created if not exists"""
+        self.file_path = file_path
+        self._local = local()
+        self._sets = 0
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS response_cache '
+                                    '(key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                                    'expires_at REAL NOT NULL)')
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the current thread, sqlite connections are not shared by threads"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.file_path, timeout=1)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Gets not expired value by key, database errors are treated as a miss"""
+        try:
+            row = self.connection.execute('SELECT value FROM response_cache '
+                                          'WHERE key = ? AND expires_at > ?',
+                                          (key, time())).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        """Sets value by key for ttl seconds, expired entries are purged periodically"""
+        self._sets += 1
+        try:
+            with self.connection as connection:
+                connection.execute('INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?)',
+                                   (key, value, time() + ttl))
+                if self._sets % SQLITE_PURGE_INTERVAL == 0:
+                    connection.execute('DELETE FROM response_cache WHERE expires_at <= ?',
+                                       (time(),))
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        """Removes all entries"""
+        with self.connection as connection:
+            connection.execute('DELETE FROM response_cache')
+
+
+class RedisBackend:
+    """Redis backend shared by all workers, works with any Redis protocol compatible server"""
+
+    def __init__(self, url: str, prefix: str = 'response:'):
+        """Constructor takes server URL and prefix of the keys"""
+        import redis  # optional dependency needed by this backend only
+
+        self.error = redis.RedisError
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Gets value by key, server errors are treated as a miss"""
+        try:
+            return self.client.get(self.prefix + key)
+        except self.error:
+            return None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        """Sets value by key, the server expires it after ttl seconds"""
+        try:
+            self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+        except self.error:
+            pass
+
+    def clear(self):
+        """Removes all entries with the prefix"""
+        keys = list(self.client.scan_iter(f'{self.prefix}*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class HotKeys:
+    """Counts requests of cache keys with their refresh functions, counts are halved
+    every time the top is taken, so keys requested lately come first"""
+
+    def __init__(self, maxsize: int = 10000):
+        """Constructor takes maximum number of tracked keys"""
+        self.maxsize = maxsize
+        self._counts: Dict[str, float] = {}
+        self._refreshes: Dict[str, Refresh] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        """Returns number of tracked keys"""
+        return len(self._counts)
+
+    def record(self, key: str, refresh: Refresh):
+        """Counts request of the key, the least requested keys are forgotten
+        when there are too many of them"""
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._refreshes[key] = refresh
+            if len(self._counts) > self.maxsize:
+                for cold_key in sorted(self._counts, key=self._counts.get)[:self.maxsize // 2]:
+                    del self._counts[cold_key], self._refreshes[cold_key]
+
+    def pop_top(self, number: int) -> List[Tuple[str, Refresh]]:
+        """Returns the most requested keys with refresh functions and halves all counts"""
+        with self._lock:
+            top = sorted(self._counts, key=self._counts.get, reverse=True)[:number]
+            top = [(key, self._refreshes[key]) for key in top]
+            for key, count in list(self._counts.items()):
+                if count < 1:
+                    del self._counts[key], self._refreshes[key]
+                else:
+                    self._counts[key] = count / 2
+        return top
+
+
+class ResponseCache:
+    """Caches serialized JSON responses in the backend chosen by RESPONSE_CACHE_BACKEND
+    ('memory', 'sqlite', 'redis' or empty to disable) for RESPONSE_CACHE_TTL seconds,
+    keys must contain versions of the tables the response is built from, so a cached
+    response is never outdated and writes make old entries unreachable.
+    After a write RESPONSE_CACHE_HOT_KEYS most requested responses are made
+    for the new versions in background, so their next requests are not missed"""
+
+    def __init__(self, app: Flask = None):
+        """Constructor takes application"""
+        self.app = None
+        self.backend = None
+        self.ttl = 0
+        self.hot_keys_number = 0
+        self.refresh_interval = 0
+        self.hot_keys = HotKeys()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._refreshing = set()
+        self._refresher = None
+        self._refresher_pid = None
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Creates backend from RESPONSE_CACHE_BACKEND and RESPONSE_CACHE_URL"""
+        backend = app.config['RESPONSE_CACHE_BACKEND']
+        url = app.config['RESPONSE_CACHE_URL']
+        if not backend:
+            self.backend = None
+        elif backend == 'memory':
+            self.backend = MemoryBackend()
+        elif backend == 'sqlite':
+            self.backend = SQLiteBackend(url)
+        elif backend == 'redis':
+            self.backend = RedisBackend(url)
+        else:
+            raise ValueError(f'Incorrect response cache backend \'{backend}\'. '
+                             f'Use \'memory\', \'sqlite\' or \'redis\'.')
+        self.app = app
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        self.hot_keys_number = app.config['RESPONSE_CACHE_HOT_KEYS']
+        self.refresh_interval = app.config['RESPONSE_CACHE_REFRESH_INTERVAL']
+
+    @staticmethod
+    def make_key(key_parts: Hashable) -> str:
+        """Makes backend key from canonical key parts"""
+        return sha1(repr(key_parts).encode()).hexdigest()
+
+    def get_or_set(self, key_parts: Hashable, make_response: Callable[[], Response],
+                   hot_key: Hashable = None, refresh: Refresh = None) -> Response:
+        """Gets cached response by key parts, on miss makes the response
+        and caches its body if it is successful. Successful requests of hot key,
+        which are key parts without table versions, are counted for background refresh"""
+        if self.backend is None:
+            return make_response()
+
+        body = self.backend.get(self.make_key(key_parts))
+        if body is not None:
+            with self._lock:
+                self.hits += 1
+            response = Response(body, mimetype=RESPONSE_MIMETYPE)
+        else:
+            with self._lock:
+                self.misses += 1
+            response = make_response()
+            if response.status_code != 200:
+                return response
+            self.backend.set(self.make_key(key_parts), response.get_data(), self.ttl)
+
+        if hot_key is not None and refresh is not None and self.hot_keys_number:
+            self.hot_keys.record(self.make_key(hot_key), refresh)
+            self.start_refresher()
+        return response
+
+    def refresh(self, hot_key: str, refresh: Refresh):
+        """Makes response of hot key for the current table versions in application
+        context unless it is cached already, that is unless the versions have moved
+        since the response was cached, the key is not refreshed by other threads meanwhile.
+        Errors are counted and logged, they never reach the refresher thread"""
+        with self._lock:
+            if hot_key in self._refreshing:
+                return
+            self._refreshing.add(hot_key)
+        try:
+            with self.app.app_context():
+                key_parts, make_response = refresh()
+                key = self.make_key(key_parts)
+                if self.backend.get(key) is not None:
+                    return
+                response = make_response()
+            if response.status_code == 200:
+                self.backend.set(key, response.get_data(), self.ttl)
+                with self._lock:
+                    self.refreshes += 1
+        except Exception as error:  # pylint: disable=broad-except
+            with self._lock:
+                self.refresh_errors += 1
+            self.app.logger.error('Response cache refresh failed - %r', error)
+        finally:
+            with self._lock:
+                self._refreshing.discard(hot_key)
+
+    def refresh_hot_keys(self):
+        """Refreshes the most requested keys which versions have moved"""
+        for hot_key, refresh in self.hot_keys.pop_top(self.hot_keys_number):
+            self.refresh(hot_key, refresh)
+
+    def start_refresher(self):
+        """Starts hot keys refresher thread once per process, it is started
+        on the first request, so forked workers start their own threads"""
+        if self._refresher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+            self._refresher = Thread(target=self.run_refresher, daemon=True)
+        self._refresher.start()
+
+    def run_refresher(self):
+        """Refreshes hot keys every RESPONSE_CACHE_REFRESH_INTERVAL seconds,
+        the thread keeps running whatever a refresh raises"""
+        while True:
+            sleep(self.refresh_interval)
+            try:
+                self.refresh_hot_keys()
+            except Exception as error:  # pylint: disable=broad-except
+                self.app.logger.error('Response cache hot keys refresh failed - %r', error)
+
+    def clear(self):
+        """Removes all cached responses and forgets hot keys"""
+        self.hot_keys = HotKeys()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        """Returns backend name, numbers of hit and missed requests,
+        background refreshes and tracked hot keys of the current worker"""
+        with self._lock:
+            return {'backend': type(self.backend).__name__ if self.backend else None,
+                    'hits': self.hits, 'misses': self.misses,
+                    'refreshes': self.refreshes, 'refresh_errors': self.refresh_errors,
+                    'refreshing': len(self._refreshing), 'hot_keys': len(self.hot_keys)}
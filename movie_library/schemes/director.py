@@ -16,6 +16,7 @@ class DirectorSchema(ma.SQLAlchemyAutoSchema):
         """Options class for schema"""
         model = Director
         load_instance = True
+        exclude = ('full_name',)
 
     @validates('first_name')
     def validate_first_name(self, first_name: str):
@@ -1,11 +1,14 @@
 """Movie schema module"""
 
-from typing import List
+from typing import List, Dict, Tuple
 
 from marshmallow import fields, validates, ValidationError
 
-from movie_library import ma
-from movie_library.models import Movie, Genre
+from movie_library import ma, db
+from movie_library.models import Movie, Genre, Director, Country, AgeRestriction
+
+REFERENCED_MODELS = {'director_id': Director, 'country_id': Country,
+                     'age_restriction_id': AgeRestriction}
 
 
 class MovieSchema(ma.SQLAlchemyAutoSchema):
@@ -88,11 +91,104 @@ class MovieSchema(ma.SQLAlchemyAutoSchema):
 
     @staticmethod
     def validate_genres_ids(genres_ids: List[int]):
-        """Validates genres ids"""
+        """Validates genres ids are list of integers"""
         if (not isinstance(genres_ids, list)
             or not all(isinstance(id_, int) for id_ in genres_ids)) \
                 and genres_ids is not None:
             raise ValidationError({'genres': ['Genres must be a list of integers.']})
-        for genre_id in genres_ids:
-            if not Genre.query.get(genre_id):
-                raise ValidationError({'genres': [f'Genre index {genre_id} does not exist.']})
+
+    @staticmethod
+    def load_genres_by_ids(genres_ids: List[int]) -> List[Genre]:
+        """Validates genres ids and loads all genres by one query"""
+        MovieSchema.validate_genres_ids(genres_ids)
+        if not genres_ids:
+            return []
+
+        genres = Genre.query.filter(Genre.id.in_(set(genres_ids))).all()
+
+        missing_genres_ids = sorted(set(genres_ids) - {genre.id for genre in genres})
+        if missing_genres_ids:
+            raise ValidationError({'genres': [f'Genre index {genre_id} does not exist.'
+                                              for genre_id in missing_genres_ids]})
+        return genres
+
+    @staticmethod
+    def load_bulk_values(values: dict) -> dict:
+        """Validates values of movies bulk update, checks referenced objects exist
+        and returns deserialized values"""
+        if not isinstance(values, dict) or not values:
+            raise ValidationError({'values': ['Values must be a not empty object.']})
+        not_updatable_fields = sorted({'id', 'user_id', 'genres'} & set(values))
+        if not_updatable_fields:
+            raise ValidationError({field_name: ['The field can not be updated in bulk.']
+                                   for field_name in not_updatable_fields})
+
+        values = MovieSchema(partial=True, load_instance=False).load(values)
+
+        errors = {}
+        for field_name, model_cls in REFERENCED_MODELS.items():
+            object_id = values.get(field_name)
+            if object_id is not None and model_cls.query.get(object_id) is None:
+                errors[field_name] = [f'{model_cls.__name__} index {object_id} does not exist.']
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    @staticmethod
+    def load_many(items: list, user_id: int) -> Tuple[List[Tuple[int, Movie, List[Genre]]],
+                                                      Dict[int, dict]]:
+        """Validates movies, checks referenced objects exist by one query per model
+        and makes movie instances, returns indexes of valid items with their movies
+        and genres and validation errors by indexes of invalid items"""
+        errors, genres_ids_by_index, valid_items = {}, {}, {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = {'_schema': ['Invalid input type.']}
+                continue
+            if 'id' in item:
+                errors[index] = {'id': ['Unknown field.']}
+                continue
+            item = dict(item, user_id=user_id)
+            genres_ids = item.pop('genres', None)
+            try:
+                MovieSchema.validate_genres_ids(genres_ids)
+            except ValidationError as error:
+                errors[index] = error.messages
+                continue
+            # repeated ids of one movie link the genre once as single post does
+            genres_ids_by_index[index] = list(dict.fromkeys(genres_ids or []))
+            valid_items[index] = item
+
+        schema = MovieSchema(many=True)
+        try:
+            movies = dict(zip(valid_items, schema.load(list(valid_items.values()),
+                                                       session=db.session)))
+        except ValidationError as error:
+            indexes = list(valid_items)
+            for position, messages in error.messages.items():
+                errors[indexes[position]] = messages
+                del valid_items[indexes[position]]
+            movies = dict(zip(valid_items, schema.load(list(valid_items.values()),
+                                                       session=db.session)))
+
+        for field_name, model_cls in REFERENCED_MODELS.items():
+            ids = {getattr(movie, field_name) for movie in movies.values()} - {None}
+            existing_ids = {id_ for id_, in db.session.query(model_cls.id).
+                            filter(model_cls.id.in_(ids))} if ids else set()
+            for index, movie in movies.items():
+                object_id = getattr(movie, field_name)
+                if object_id is not None and object_id not in existing_ids:
+                    errors.setdefault(index, {})[field_name] = [
+                        f'{model_cls.__name__} index {object_id} does not exist.']
+
+        genres_ids = {id_ for index in movies for id_ in genres_ids_by_index[index]}
+        genres_by_ids = {genre.id: genre for genre in
+                         Genre.query.filter(Genre.id.in_(genres_ids))} if genres_ids else {}
+        for index in movies:
+            missing_genres_ids = sorted(set(genres_ids_by_index[index]) - set(genres_by_ids))
+            if missing_genres_ids:
+                errors.setdefault(index, {})['genres'] = [
+                    f'Genre index {genre_id} does not exist.' for genre_id in missing_genres_ids]
+
+        return [(index, movie, [genres_by_ids[id_] for id_ in genres_ids_by_index[index]])
+                for index, movie in movies.items() if index not in errors], errors
@@ -0,0 +1,128 @@
+"""Compiled serializer module"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Tuple
+
+from flask import current_app
+from flask_restx import fields, marshal
+
+SIMPLE_FORMATTERS = {fields.String: str, fields.Integer: int, fields.Float: float}
+
+compiled_models: Dict[int, Tuple[dict, Callable[[Any], Any]]] = {}
+
+
+def get_value(object_: Any, key: str) -> Any:
+    """Gets value by key from dictionary or by attribute name from object
+    the same way flask-restx fields do"""
+    if isinstance(object_, dict) and key in object_:
+        return object_[key]
+    return getattr(object_, key, None)
+
+
+def compile_value_formatter(field: fields.Raw) -> Callable[[Any], Any]:
+    """Compiles function formatting value taken from object as the field output does"""
+    if isinstance(field, fields.Nested):
+        return compile_nested_formatter(field)
+    if isinstance(field, fields.List):
+        return compile_list_formatter(field)
+
+    if type(field) in SIMPLE_FORMATTERS:
+        format_value = SIMPLE_FORMATTERS[type(field)]
+    elif type(field) is fields.DateTime and field.dt_format == 'iso8601':
+        def format_value(value):
+            return value.isoformat() if type(value) is datetime else field.format(value)
+    elif type(field) is fields.Raw:
+        def format_value(value):
+            return value
+    else:
+        format_value = field.format
+
+    default = field.default
+    none_output = field.format(default) if default else default
+
+    def format_field_value(value):
+        return none_output if value is None else format_value(value)
+    return format_field_value
+
+
+def compile_nested_formatter(field: fields.Nested) -> Callable[[Any], Any]:
+    """Compiles function formatting nested object or list of nested objects"""
+    serialize = compile_model(field.nested)
+
+    def format_nested_value(value):
+        if value is None:
+            if field.allow_null:
+                return None
+            if field.default is not None:
+                return field.default
+        return serialize(value)
+    return format_nested_value
+
+
+def compile_list_formatter(field: fields.List) -> Callable[[Any], Any]:
+    """Compiles function formatting list of values, other values are left to the field"""
+    format_item = compile_value_formatter(field.container)
+    default = field.default
+
+    def format_list_value(value):
+        if isinstance(value, (list, tuple)):
+            return [format_item(item) for item in value]
+        if value is None:
+            return default
+        return field.format(value) if isinstance(value, set) \
+            else [marshal(value, field.container.nested)]
+    return format_list_value
+
+
+def is_compilable(key: str, field: fields.Raw) -> bool:
+    """Checks field takes value by its key or plain attribute name, without default
+    factory, mask or none skipping, otherwise field output is used as it is"""
+    attribute = field.attribute if field.attribute is not None else key
+    return isinstance(attribute, str) and '.' not in attribute and not callable(field.default) \
+        and field.mask is None and not getattr(field, 'skip_none', False) \
+        and (not isinstance(field, fields.List) or is_compilable(key, field.container))
+
+
+def compile_model(api_model: dict) -> Callable[[Any], Any]:
+    """Compiles function making the same output as flask-restx marshal
+    of object or list of objects by the model, the function is cached by model"""
+    compiled_model = compiled_models.get(id(api_model))
+    if compiled_model is not None and compiled_model[0] is api_model:
+        return compiled_model[1]
+
+    model_fields = getattr(api_model, 'resolved', api_model)
+    if getattr(api_model, '__mask__', None) or \
+            any(isinstance(field, (dict, type)) for field in model_fields.values()):
+        def serialize(data):
+            return marshal(data, api_model)
+    else:
+        getters = []
+        for key, field in model_fields.items():
+            if is_compilable(key, field):
+                getters.append((key, field.attribute if field.attribute is not None else key,
+                                compile_value_formatter(field)))
+            else:
+                getters.append((key, None, lambda object_, key=key, field=field:
+                                field.output(key, object_)))
+        getters = tuple(getters)
+
+        def serialize_object(object_):
+            return {key: format_value(get_value(object_, attribute)) if attribute is not None
+                    else format_value(object_)
+                    for key, attribute, format_value in getters}
+
+        def serialize(data):
+            if isinstance(data, (list, tuple)):
+                return [serialize_object(object_) for object_ in data]
+            return serialize_object(data)
+
+    compiled_models[id(api_model)] = (api_model, serialize)
+    return serialize
+
+
+def fast_marshal(data: Any, api_model: dict) -> Any:
+    """Marshals object or list of objects by compiled serializer
+    if COMPILED_SERIALIZER is enabled else by flask-restx marshal"""
+    if current_app.config['COMPILED_SERIALIZER']:
+        return compile_model(api_model)(data)
+    return marshal(data, api_model)
@@ -0,0 +1,81 @@
+"""Request coalescing module"""
+
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable
+
+from flask import Flask
+
+
+class Flight:
+    """Computation in progress, its result or error is shared by waiting callers"""
+
+    def __init__(self):
+        """Constructor creates event set when the computation is done"""
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs only one computation per key at a time, concurrent callers with the same key
+    wait for it up to SINGLE_FLIGHT_TIMEOUT seconds and share its result,
+    callers which waited too long compute the result themselves"""
+
+    def __init__(self, app: Flask = None):
+        """Constructor takes application"""
+        self.timeout = None
+        self.executed = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Takes wait timeout from the application config"""
+        self.timeout = app.config['SINGLE_FLIGHT_TIMEOUT']
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Returns result of the function, the function runs once for concurrent calls
+        with equal keys, its exception is raised in every waiting caller"""
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flights[key] = Flight()
+                self.executed += 1
+
+        if not is_leader:
+            return self.wait(flight, function)
+
+        try:
+            flight.result = function()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def wait(self, flight: Flight, function: Callable[[], Any]) -> Any:
+        """Waits for result of the flight, on timeout runs the function itself"""
+        if not flight.done.wait(self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            return function()
+
+        with self._lock:
+            self.coalesced += 1
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stats(self) -> dict:
+        """Returns number of executed computations, callers which shared their results,
+        callers which stopped waiting and computations in progress"""
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced,
+                    'timeouts': self.timeouts, 'in_flight': len(self._flights)}
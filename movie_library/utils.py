@@ -1,15 +1,31 @@
 """Application utilities"""
 
-from typing import Type, List, Callable
-from datetime import datetime
+import csv
+import json
+from hashlib import sha1
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from collections import OrderedDict
+from io import StringIO
+from typing import Type, List, Callable, Tuple, Any, Hashable, Iterable, Iterator, Optional
+from datetime import datetime, timezone
+from decimal import Decimal
 from functools import wraps
+from threading import Lock
+from time import monotonic
 
-from flask import abort, request
+from flask import abort, request, current_app, g, Response
 from flask_login import current_user, login_user
+from flask_restx import fields
+from flask_restx.representations import output_json
+from flask_restx.utils import unpack
+from sqlalchemy import and_, or_, inspect, event, true
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import selectinload
+from werkzeug.http import http_date, quote_etag
 
-from movie_library import db, log
-from movie_library.models import User
+from movie_library import db, log, replica_router, response_cache, single_flight
+from movie_library.serializer import fast_marshal
+from movie_library.models import User, TableVersion
 
 
 class AuthenticationError(Exception):
@@ -20,35 +36,225 @@ class OwnershipError(Exception):
     """Exception raised when user tries to change a record belonging to another user."""
 
 
+class TTLCache:
+    """Thread-safe in-process cache which entries expire after ttl seconds"""
+
+    def __init__(self, maxsize: int = None):
+        """Constructor takes maximum number of entries, the least recently used
+        entry is evicted when it is exceeded"""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Gets not expired value by key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """Sets value by key for ttl seconds"""
+        with self._lock:
+            self._entries[key] = (value, monotonic() + ttl)
+            self._entries.move_to_end(key)
+            if self.maxsize is not None and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any], ttl: float) -> Any:
+        """Gets value by key, on miss loads it with loader and caches for ttl seconds"""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """Removes value by key"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes all values and resets counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Returns hit, miss and eviction counters"""
+        with self._lock:
+            requests_number = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._entries),
+                    'hit_ratio': self.hits / requests_number if requests_number else None}
+
+
+CHANGED_OBJECTS_KEY = 'changed_objects'
+TABLE_VERSIONS_KEY = 'table_versions'
+USER_CACHE_MAXSIZE = 10000
+COUNT_CACHE_MAXSIZE = 10000
+FACETS_CACHE_MAXSIZE = 1000
+COUNT_MODES = ('exact', 'estimated')
+# parameters which select page and its form, they are part of query key as they are
+QUERY_KEY_PARAM_NAMES = ('sort', 'page', 'page_size', 'cursor', 'count')
+
+reference_cache = TTLCache()
+user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE)
+count_cache = TTLCache(maxsize=COUNT_CACHE_MAXSIZE)
+# facets of the worker used when shared response cache is turned off
+facets_cache = TTLCache(maxsize=FACETS_CACHE_MAXSIZE)
+stats_providers = {'reference_cache': reference_cache.stats, 'user_cache': user_cache.stats,
+                   'count_cache': count_cache.stats, 'facets_cache': facets_cache.stats,
+                   'log': log.stats}
+
+
+@event.listens_for(db.session, 'before_flush')
+def collect_changed_objects(session, flush_context, instances):
+    """Remembers objects changed in transaction until commit helpers handle them"""
+    session.info.setdefault(CHANGED_OBJECTS_KEY, set()). \
+        update(session.new, session.dirty, session.deleted)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_changed_objects(session):
+    """Forgets objects changed in rolled back transaction"""
+    session.info.pop(CHANGED_OBJECTS_KEY, None)
+
+
+def get_sort_attrs_and_modes(sort_data: List[str],
+                             valid_sorting_values: tuple) -> List[Tuple[str, str]]:
+    """Gets pairs of sort attribute and sort mode from sort data"""
+    sort_attrs_and_modes = []
+
+    for sort_value in sort_data:
+        sort_attr_and_mode = sort_value.split(',')
+        if len(sort_attr_and_mode) == 1:
+            sort_attr_and_mode.append('desc')
+        sort_attr, mode = sort_attr_and_mode
+
+        if sort_attr not in valid_sorting_values:
+            raise ValueError(f'Incorrect input: sort parameter \'{sort_attr}\'. '
+                             f'Valid sorting parameters - {", ".join(valid_sorting_values)}.')
+        if mode not in ('asc', 'desc'):
+            raise ValueError(f'Incorrect input: sorting mode parameter \'{mode}\'. '
+                             f'Use \'asc\' or \'desc\' -  by default.')
+        sort_attrs_and_modes.append((sort_attr, mode))
+
+    return sort_attrs_and_modes
+
+
 def get_order_objects_list(sort_data: List[str], model_cls: Type[db.Model],
                            valid_sorting_values: tuple) -> list:
     """Gets order objects from sort data"""
     order_by = []
 
-    if sort_data:
-        for sort_value in sort_data:
-            sort_attr_and_mode = sort_value.split(',')
-            if len(sort_attr_and_mode) == 1:
-                sort_attr_and_mode.append('desc')
-            sort_attr, mode = sort_attr_and_mode
-
-            if sort_attr in valid_sorting_values:
-                if mode == 'asc':
-                    order_by.append(getattr(model_cls, sort_attr))
-                elif mode == 'desc':
-                    order_by.append(getattr(model_cls, sort_attr).desc())
-                else:
-                    raise ValueError(f'Incorrect input: sorting mode parameter \'{mode}\'. '
-                                     f'Use \'asc\' or \'desc\' -  by default.')
-            else:
-                raise ValueError(f'Incorrect input: sort parameter \'{sort_attr}\'. '
-                                 f'Valid sorting parameters - {", ".join(valid_sorting_values)}.')
-    else:
+    for sort_attr, mode in get_sort_attrs_and_modes(sort_data, valid_sorting_values):
+        if mode == 'asc':
+            order_by.append(getattr(model_cls, sort_attr))
+        else:
+            order_by.append(getattr(model_cls, sort_attr).desc())
+
+    if not order_by:
         order_by.append(None)
 
     return order_by
 
 
+def get_keyset_order_objects_list(model_cls: Type[db.Model],
+                                  sort_attrs_and_modes: List[Tuple[str, str]]) -> list:
+    """Gets order objects for keyset pagination, null values are always placed last"""
+    return [getattr(model_cls, sort_attr).asc().nullslast() if mode == 'asc'
+            else getattr(model_cls, sort_attr).desc().nullslast()
+            for sort_attr, mode in sort_attrs_and_modes]
+
+
+def get_keyset_condition(model_cls: Type[db.Model],
+                         sort_attrs_and_modes: List[Tuple[str, str]], values: list):
+    """Gets condition selecting rows placed after the row with given sort key values"""
+    after_conditions = []
+    equal_conditions = []
+
+    for (sort_attr, mode), value in zip(sort_attrs_and_modes, values):
+        column = getattr(model_cls, sort_attr)
+        nullable = column.property.columns[0].nullable
+
+        if value is None:
+            # nulls are placed last, so only other nulls can follow a null value
+            equal_conditions.append(column.is_(None))
+            continue
+
+        after_condition = column > value if mode == 'asc' else column < value
+        if nullable:
+            after_condition = or_(after_condition, column.is_(None))
+        after_conditions.append(and_(*equal_conditions, after_condition))
+        equal_conditions.append(column == value)
+
+    return or_(*after_conditions)
+
+
+def get_keyset_values(object_: db.Model, sort_attrs_and_modes: List[Tuple[str, str]]) -> list:
+    """Gets json serializable sort key values of the object"""
+    values = []
+    for sort_attr, _ in sort_attrs_and_modes:
+        value = getattr(object_, sort_attr)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        values.append(value)
+    return values
+
+
+def parse_keyset_values(model_cls: Type[db.Model],
+                        sort_attrs_and_modes: List[Tuple[str, str]], values: list) -> list:
+    """Converts sort key values from cursor back to column python types"""
+    if not isinstance(values, list) or len(values) != len(sort_attrs_and_modes):
+        raise ValueError('Parameter cursor is invalid.')
+
+    parsed_values = []
+    for (sort_attr, _), value in zip(sort_attrs_and_modes, values):
+        python_type = getattr(model_cls, sort_attr).type.python_type
+        try:
+            if value is None:
+                parsed_values.append(None)
+            elif python_type is datetime:
+                parsed_values.append(datetime.fromisoformat(value))
+            else:
+                parsed_values.append(python_type(value))
+        except (ValueError, TypeError, ArithmeticError) as error:
+            raise ValueError('Parameter cursor is invalid.') from error
+    return parsed_values
+
+
+def encode_cursor(cursor_data: dict) -> str:
+    """Encodes cursor data to opaque url-safe string"""
+    cursor_json = json.dumps(cursor_data, separators=(',', ':'))
+    return urlsafe_b64encode(cursor_json.encode('utf8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decodes cursor string made by encode_cursor"""
+    try:
+        cursor_json = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf8')
+        cursor_data = json.loads(cursor_json)
+    except (ValueError, TypeError) as error:
+        raise ValueError('Parameter cursor is invalid.') from error
+
+    if not isinstance(cursor_data, dict):
+        raise ValueError('Parameter cursor is invalid.')
+    return cursor_data
+
+
 def parse_query_parameters(args: dict) -> dict:
     """Parses and validates query parameters from dictionary"""
     params = dict(args)
@@ -71,15 +277,180 @@ def parse_query_parameters(args: dict) -> dict:
     if params['page_size'] > 50:
         raise ValueError('Parameter page_size maximum value is 50.')
 
+    if 'count' in params and params['count'] not in COUNT_MODES:
+        raise ValueError(f'Incorrect input: count parameter \'{params["count"]}\'. '
+                         f'Valid modes - {", ".join(COUNT_MODES)}.')
+
+    return params
+
+
+def get_filters_key(model_cls: Type[db.Model], params: dict, filter_names: tuple,
+                    unordered_filter_names: tuple = ()) -> tuple:
+    """Gets hashable key of case insensitive filter parameters, values of unordered
+    filters are comma separated lists which order and duplicates are ignored,
+    whitespace is kept, because it changes the result or makes the value invalid"""
+    filters = []
+    for name in filter_names:
+        value = (params.get(name) or '').lower()
+        if name in unordered_filter_names:
+            value = ','.join(sorted(set(value.split(','))))
+        if value:
+            filters.append((name, value))
+    return (model_cls.__tablename__, *filters)
+
+
+def get_query_key(model_cls: Type[db.Model], params: dict, filter_names: tuple,
+                  unordered_filter_names: tuple = ()) -> tuple:
+    """Gets hashable key of canonical query parameters, equal keys select the same page,
+    sorting and paging values are taken raw, so an invalid value never shares a key
+    with a cached response of the valid one"""
+    return (*get_filters_key(model_cls, params, filter_names, unordered_filter_names),
+            *((name, params[name]) for name in QUERY_KEY_PARAM_NAMES if name in params))
+
+
+def count_query(query) -> int:
+    """Counts rows of query without its ordering"""
+    return query.order_by(None).count()
+
+
+def estimate_query_count(query) -> int:
+    """Gets number of query rows estimated by PostgreSQL planner,
+    other databases have no cheap estimate, so the rows are counted"""
+    if db.engine.dialect.name != 'postgresql':
+        return count_query(query)
+
+    statement = query.order_by(None).statement. \
+        compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    plan = db.session.connection(). \
+        exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', statement.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_page_with_metadata(query, params: dict, filters_key: Hashable) -> dict:
+    """Gets page of query objects with total number of objects, has_next flag
+    and next page number, total is counted or estimated according to count parameter,
+    estimates are cached by filters key"""
+    offset = params['page_size'] * (params['page'] - 1)
+    items = query.offset(offset).limit(params['page_size'] + 1).all()
+    has_next = len(items) > params['page_size']
+    items = items[:params['page_size']]
+    seen_number = offset + len(items) + int(has_next)
+
+    if not items or not has_next:
+        # the last page holds the exact total
+        total = seen_number if items else 0
+    elif params['count'] == 'exact':
+        total = count_query(query)
+    else:
+        total = max(count_cache.get_or_set(filters_key, lambda: estimate_query_count(query),
+                                           current_app.config['COUNT_CACHE_TTL']),
+                    seen_number)
+
+    return {'items': items, 'total': total, 'has_next': has_next,
+            'next_page': params['page'] + 1 if has_next else None}
+
+
+def parse_export_parameters(args: dict, export_formats: tuple) -> dict:
+    """Parses and validates export query parameters from dictionary"""
+    params = dict(args)
+    params.setdefault('format', export_formats[0])
+    chunk_size = params.get('chunk_size', 500)
+
+    if params['format'] not in export_formats:
+        raise ValueError(f'Incorrect input: format parameter \'{params["format"]}\'. '
+                         f'Valid formats - {", ".join(export_formats)}.')
+
+    if isinstance(chunk_size, str) and not chunk_size.isdigit():
+        raise ValueError('Parameter chunk_size must be positive integer.')
+    params['chunk_size'] = int(chunk_size)
+
+    if not 1 <= params['chunk_size'] <= 5000:
+        raise ValueError('Parameter chunk_size must be in range from 1 to 5000.')
+
     return params
 
 
+def parse_bulk_parameters(args: dict, items: Any) -> dict:
+    """Parses and validates bulk request items and query parameters,
+    all items are processed in one chunk by default"""
+    max_items = current_app.config['BULK_MAX_ITEMS']
+    if not isinstance(items, list) or not items:
+        raise ValueError('Request body must be a not empty list.')
+    if len(items) > max_items:
+        raise ValueError(f'Request body maximum length is {max_items}.')
+
+    params = dict(args)
+    chunk_size = params.get('chunk_size', len(items))
+
+    if isinstance(chunk_size, str) and not chunk_size.isdigit():
+        raise ValueError('Parameter chunk_size must be positive integer.')
+    params['chunk_size'] = int(chunk_size)
+
+    if not 1 <= params['chunk_size'] <= max_items:
+        raise ValueError(f'Parameter chunk_size must be in range from 1 to {max_items}.')
+
+    return params
+
+
+def parse_bulk_selection(body: Any, filter_names: tuple) -> dict:
+    """Parses and validates selection of bulk request body,
+    objects are selected by list of ids or by not empty filter"""
+    max_items = current_app.config['BULK_MAX_ITEMS']
+    if not isinstance(body, dict) or ('ids' in body) == ('filter' in body):
+        raise ValueError('Request body must contain either ids or filter.')
+
+    if 'ids' in body:
+        ids = body['ids']
+        if not isinstance(ids, list) or not ids \
+                or not all(isinstance(id_, int) and not isinstance(id_, bool) for id_ in ids):
+            raise ValueError('Parameter ids must be a not empty list of integers.')
+        if len(ids) > max_items:
+            raise ValueError(f'Parameter ids maximum length is {max_items}.')
+        return {'ids': ids}
+
+    filter_ = body['filter']
+    if not isinstance(filter_, dict) or not set(filter_) <= set(filter_names) \
+            or not all(isinstance(value, str) for value in filter_.values()):
+        raise ValueError(f'Parameter filter must be an object with string values of '
+                         f'{", ".join(filter_names)}.')
+    if not any(filter_.values()):
+        raise ValueError('Parameter filter must contain at least one not empty value.')
+    return {'filter': filter_}
+
+
+def generate_ndjson(objects: Iterable[db.Model], api_model: dict) -> Iterator[str]:
+    """Yields marshalled objects as JSON lines"""
+    for object_ in objects:
+        yield json.dumps(fast_marshal(object_, api_model)) + '\n'
+
+
+def generate_csv(objects: Iterable[db.Model], api_model: dict, header: tuple,
+                 get_row: Callable[[dict], list]) -> Iterator[str]:
+    """Yields CSV header and rows made by get_row from marshalled objects"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for object_ in objects:
+        writer.writerow(get_row(fast_marshal(object_, api_model)))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
 def verify_ownership_by_user_id(user_id: int, error_message: str):
     """Checks ownership of current user according to user_id or if admin"""
     if not (current_user.is_admin or current_user.id == user_id):
         raise OwnershipError(error_message)
 
 
+def get_ownership_condition(model_cls: Type[db.Model]):
+    """Gets SQL condition selecting objects of current user or all objects for admin"""
+    return true() if current_user.is_admin else model_cls.user_id == current_user.id
+
+
 def admin_required(function: Callable) -> Callable:
     """Decorator raises 403 exception if current user is not admin"""
 
@@ -104,37 +475,228 @@ def unauthorized_required(function: Callable) -> Callable:
     return wrapper
 
 
-def get_by_id_or_404(model_cls: Type[db.Model], object_id: int) -> db.Model:
+def is_not_modified(etag: str, last_modified: datetime) -> bool:
+    """Checks request validators, If-None-Match takes precedence over If-Modified-Since"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        if_modified_since = request.if_modified_since
+        if if_modified_since.tzinfo is not None:
+            if_modified_since = if_modified_since.astimezone(timezone.utc).replace(tzinfo=None)
+        return last_modified.replace(microsecond=0) <= if_modified_since
+    return False
+
+
+def has_session_cookie() -> bool:
+    """Checks the client sends session or remember me cookie"""
+    return current_app.session_cookie_name in request.cookies or \
+        current_app.config.get('REMEMBER_COOKIE_NAME', 'remember_token') in request.cookies
+
+
+def get_cache_control(max_age: Optional[int] = None) -> str:
+    """Gets Cache-Control of read response, shared caches may keep responses to anonymous
+    clients for CACHE_CONTROL_MAX_AGE seconds at most, responses to clients with
+    session cookie are private and revalidated every time"""
+    if has_session_cookie():
+        return 'private, no-cache'
+    public_max_age = current_app.config['CACHE_CONTROL_MAX_AGE']
+    if max_age is not None:
+        public_max_age = min(max_age, public_max_age)
+    return f'public, max-age={public_max_age}, ' \
+           f'stale-while-revalidate={current_app.config["CACHE_CONTROL_STALE_WHILE_REVALIDATE"]}'
+
+
+def conditional_get(*table_names: str) -> Callable:
+    """Decorator adds ETag, Last-Modified and Cache-Control headers to GET response
+    and returns 304 before the function runs if the client has current response,
+    validators are made of versions of the tables the response is built from"""
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            versions = TableVersion.get_versions(table_names)
+            g.setdefault(TABLE_VERSIONS_KEY, {}).update(versions)
+
+            version_tag = ';'.join(f'{table_name}:{versions.get(table_name, (0,))[0]}'
+                                   for table_name in sorted(table_names))
+            etag = sha1(f'{request.full_path}|{version_tag}'.encode()).hexdigest()
+            last_modified = max((updated_at for _, updated_at in versions.values()),
+                                default=datetime(1970, 1, 1))
+            headers = {'ETag': quote_etag(etag), 'Last-Modified': http_date(last_modified),
+                       'Cache-Control': get_cache_control(), 'Vary': 'Cookie'}
+
+            if is_not_modified(etag, last_modified):
+                return Response(status=304, headers=headers)
+
+            result = function(*args, **kwargs)
+            if isinstance(result, Response):
+                if result.status_code == 200:
+                    headers['Cache-Control'] = get_cache_control(result.cache_control.max_age)
+                    result.headers.update(headers)
+                return result
+
+            data, code, response_headers = unpack(result)
+            if code == 200:
+                response_headers.update(headers)
+            return data, code, response_headers
+        return wrapper
+    return decorator
+
+
+def make_json_response(data: Any) -> Response:
+    """Makes JSON response the same way flask-restx represents handler results"""
+    response = output_json(data, 200)
+    response.mimetype = 'application/json'
+    return response
+
+
+def get_versions_key(versions: dict = None) -> tuple:
+    """Gets hashable key of table versions, by default of the versions read by conditional_get"""
+    if versions is None:
+        versions = g.get(TABLE_VERSIONS_KEY, {})
+    return tuple(sorted((table_name, version) for table_name, (version, _) in versions.items()))
+
+
+def get_coalesced_json_response(key_parts: tuple, make_data: Callable[[], Any]) -> Response:
+    """Makes JSON response once for concurrent requests with equal key parts
+    and table versions, every request gets its own response with the shared body"""
+    body = single_flight.do((*key_parts, get_versions_key()),
+                            lambda: make_json_response(make_data()).get_data())
+    return Response(body, mimetype='application/json')
+
+
+def get_cached_json_response(key_parts: tuple, make_data: Callable[[], Any]) -> Response:
+    """Gets JSON response from shared response cache, the key is extended by versions
+    of the tables read by conditional_get, so bumping them by the write helpers
+    invalidates the entry, responses without table versions are not cached.
+    Hot responses are made again in background once the versions have moved"""
+    versions_key = get_versions_key()
+    if not versions_key:
+        return get_coalesced_json_response(key_parts, make_data)
+
+    def refresh() -> Tuple[tuple, Callable[[], Response]]:
+        table_names = [table_name for table_name, _ in versions_key]
+        current_versions_key = get_versions_key(TableVersion.get_versions(table_names))
+        return (*key_parts, current_versions_key), lambda: make_json_response(make_data())
+
+    return response_cache.get_or_set((*key_parts, versions_key),
+                                     lambda: get_coalesced_json_response(key_parts, make_data),
+                                     key_parts, refresh)
+
+
+def get_eager_load_options(model_cls: Type[db.Model], api_model: dict) -> list:
+    """Gets selectin loading options for relationships marshalled as nested fields of api model,
+    so a list of objects is loaded in a constant number of queries"""
+    relationships = inspect(model_cls).relationships
+    options = []
+    for key, field in api_model.items():
+        if isinstance(field, fields.List):
+            field = field.container
+        if isinstance(field, fields.Nested) and key in relationships:
+            options.append(selectinload(getattr(model_cls, key)))
+    return options
+
+
+def get_by_id_or_404(model_cls: Type[db.Model], object_id: int, *options) -> db.Model:
     """Gets object by id and raises exception if not found"""
-    object_ = model_cls.query.get(object_id)
+    object_ = model_cls.query.options(*options).get(object_id)
     if not object_:
         raise NoResultFound(f'{model_cls.__name__} not found.')
     return object_
 
 
-def get_all_or_404(model_cls: Type[db.Model]) -> List[db.Model]:
-    """Gets list of objects and raises exception if list is empty"""
-    objects = model_cls.query.all()
+def get_column_values(object_: db.Model) -> dict:
+    """Gets dictionary of object column values"""
+    return {column.key: getattr(object_, column.key) for column in object_.__table__.columns}
+
+
+def get_all_cached(model_cls: Type[db.Model]) -> List[dict]:
+    """Gets list of objects column values from reference cache, the cached list
+    is reloaded if it is older than table version read by conditional GET"""
+    table_name = model_cls.__tablename__
+    version = g.get(TABLE_VERSIONS_KEY, {}).get(table_name, (None,))[0]
+    cached = reference_cache.get(table_name)
+    if cached is None or version is not None and cached[0] != version:
+        cached = (version, [get_column_values(object_) for object_ in model_cls.query.all()])
+        reference_cache.set(table_name, cached, current_app.config['REFERENCE_CACHE_TTL'])
+    return cached[1]
+
+
+def get_all_cached_or_404(model_cls: Type[db.Model]) -> List[dict]:
+    """Gets list of objects column values from reference cache
+    and raises exception if list is empty"""
+    objects = get_all_cached(model_cls)
     if not objects:
         raise NoResultFound(f'No {model_cls.__name__.lower()} set found.')
     return objects
 
 
+def get_cached_ids_by_titles(model_cls: Type[db.Model], titles: Iterable[str]) -> List[int]:
+    """Gets ids of objects by case insensitive titles from reference cache,
+    titles of not existing objects are skipped"""
+    ids_by_titles = {object_['title'].lower(): object_['id']
+                     for object_ in get_all_cached(model_cls)}
+    return [ids_by_titles[title.lower()] for title in titles
+            if title.lower() in ids_by_titles]
+
+
+def get_changed_table_names(changed_objects: Iterable[db.Model]) -> set:
+    """Gets names of tables of changed objects and of their association tables"""
+    table_names = set()
+    for object_ in changed_objects:
+        mapper = inspect(object_).mapper
+        table_names.add(mapper.local_table.name)
+        table_names.update(relationship.secondary.name for relationship in mapper.relationships
+                           if relationship.secondary is not None)
+    return table_names
+
+
+def commit_changes():
+    """Commits session together with versions of changed tables
+    and invalidates caches of changed objects"""
+    db.session.flush()
+    changed_objects = db.session.info.pop(CHANGED_OBJECTS_KEY, set())
+    changed_table_names = get_changed_table_names(changed_objects)
+    TableVersion.bump(changed_table_names)
+    db.session.commit()
+    replica_router.record_write()
+
+    for table_name in changed_table_names:
+        reference_cache.invalidate(table_name)
+    for object_ in changed_objects:
+        if isinstance(object_, User):
+            user_cache.invalidate(object_.id)
+
+
+def execute_changes(table_names: Iterable[str], *statements) -> List[int]:
+    """Executes statements and commits them together with versions of changed tables,
+    invalidates caches of the tables and returns numbers of affected rows"""
+    table_names = set(table_names)
+    rowcounts = [db.session.execute(statement).rowcount for statement in statements]
+    if any(rowcounts):
+        TableVersion.bump(table_names)
+        replica_router.record_write()
+    db.session.commit()
+
+    for table_name in table_names:
+        reference_cache.invalidate(table_name)
+    return rowcounts
+
+
 def add_model_object(object_: db.Model):
     """Adds model object to database"""
     db.session.add(object_)
-    db.session.commit()
+    commit_changes()
 
 
 def update_model_object():
     """Updates model object"""
-    db.session.commit()
+    commit_changes()
 
 
 def delete_model_object(object_: db.Model):
     """Deletes model object"""
     db.session.delete(object_)
-    db.session.commit()
+    commit_changes()
 
 
 def refresh_and_login_user(user: User):
@@ -146,16 +708,18 @@ def refresh_and_login_user(user: User):
 
 def log_info():
     """Saves a record of user action, request method and path"""
-    log.logger.info(f'{current_user} - {request.method} - {request.full_path.rstrip("?")}')
+    log.logger.info('%s - %s - %s', str(current_user), request.method,
+                    request.full_path.rstrip('?'))
 
 
 def log_object_info(object_: db.Model):
-    """Saves a record of user action, request method, path, object and json"""
-    log.logger.info(f'{current_user} - {request.method} - {request.full_path.rstrip("?")}'
-                    f' - {repr(object_)} - {request.json}')
+    """Saves a record of user action, request method, path, object and json,
+    json is formatted by the log handler"""
+    log.logger.info('%s - %s - %s - %s - %s', str(current_user), request.method,
+                    request.full_path.rstrip('?'), repr(object_), request.json)
 
 
 def log_error(error: Exception):
     """Saves a record of user request error, method, path, and error"""
-    log.logger.error(f'{current_user} - {request.method} - '
-                     f'{request.full_path.rstrip("?")} - {error.__class__.__name__}')
+    log.logger.error('%s - %s - %s - %s', str(current_user), request.method,
+                     request.full_path.rstrip('?'), error.__class__.__name__)
@@ -6,3 +6,5 @@ from .genre import GenresResource, GenreResource
 from .country import CountriesResource, CountryResource
 from .age_restriction import AgeRestrictionsResource, AgeRestrictionResource
 from .user import UserLogin, UserLogout, UserRegister
+from .stats import StatsResource
+from .analytics import AnalyticsResource
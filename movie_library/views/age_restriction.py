@@ -5,12 +5,12 @@ from flask_restx import Resource
 from marshmallow.exceptions import ValidationError
 from sqlalchemy.exc import NoResultFound
 
-from movie_library import api, db
+from movie_library import api, db, replica_router
 from movie_library.models import AgeRestriction, age_restriction_model
 from movie_library.schemes import AgeRestrictionSchema
-from movie_library.utils import admin_required, get_all_or_404, get_by_id_or_404, \
+from movie_library.utils import admin_required, get_all_cached_or_404, get_by_id_or_404, \
     add_model_object, update_model_object, delete_model_object, \
-    log_error, log_info, log_object_info
+    log_error, log_info, log_object_info, conditional_get
 
 age_restriction_schema = AgeRestrictionSchema()
 
@@ -23,11 +23,14 @@ class AgeRestrictionsResource(Resource):
     """Age restriction plural resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get('age_restriction')
+    @age_restriction_ns.response(304, 'Not modified')
     @age_restriction_ns.marshal_list_with(age_restriction_model)
     def get():
         """Returns list of age restriction objects"""
         try:
-            age_restrictions = get_all_or_404(AgeRestriction)
+            age_restrictions = get_all_cached_or_404(AgeRestriction)
 
             log_info()
         except NoResultFound as error:
@@ -61,6 +64,9 @@ class AgeRestrictionResource(Resource):
     """Age restriction singular resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get('age_restriction')
+    @age_restriction_ns.response(304, 'Not modified')
     @age_restriction_ns.marshal_with(age_restriction_model)
     def get(age_restriction_id: int):
         """Returns age restriction object"""
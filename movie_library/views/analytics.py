@@ -0,0 +1,34 @@
+"""Analytics view module"""
+
+from flask_restx import Resource
+
+from movie_library import api, replica_router
+from movie_library.models import MovieAggregate, analytics_group_model
+from movie_library.serializer import fast_marshal
+from movie_library.utils import log_info, conditional_get, get_cached_json_response
+# registers listeners which keep aggregates up to date
+from movie_library import analytics  # pylint: disable=unused-import
+
+analytics_ns = api.namespace(name='Analytics', path='/analytics',
+                             description='catalog analytics methods')
+
+
+@analytics_ns.route('/<any(genres,directors,countries,years):dimension>')
+@analytics_ns.param('dimension', 'Grouping of movies: genres, directors, countries or years')
+class AnalyticsResource(Resource):
+    """Analytics resource"""
+
+    @staticmethod
+    @replica_router.read_only
+    @conditional_get('movie_aggregate', 'genre', 'director', 'country')
+    @analytics_ns.response(304, 'Not modified')
+    @analytics_ns.response(200, 'Success', [analytics_group_model])
+    def get(dimension: str):
+        """Returns number of movies, average rating and total budget per group,
+        the numbers are read from aggregates maintained on movie changes"""
+        groups = get_cached_json_response(
+            ('analytics', dimension),
+            lambda: fast_marshal(MovieAggregate.get_groups(dimension), analytics_group_model))
+
+        log_info()
+        return groups
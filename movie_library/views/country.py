@@ -5,12 +5,12 @@ from flask_restx import Resource
 from marshmallow.exceptions import ValidationError
 from sqlalchemy.exc import NoResultFound
 
-from movie_library import api, db
+from movie_library import api, db, replica_router
 from movie_library.models import Country, country_model
 from movie_library.schemes import CountrySchema
-from movie_library.utils import admin_required, get_all_or_404, get_by_id_or_404, \
+from movie_library.utils import admin_required, get_all_cached_or_404, get_by_id_or_404, \
     add_model_object, update_model_object, delete_model_object, \
-    log_error, log_info, log_object_info
+    log_error, log_info, log_object_info, conditional_get
 
 country_schema = CountrySchema()
 
@@ -22,11 +22,14 @@ class CountriesResource(Resource):
     """Country plural resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get('country')
+    @country_ns.response(304, 'Not modified')
     @country_ns.marshal_list_with(country_model)
     def get():
         """Returns list of country objects"""
         try:
-            countries = get_all_or_404(Country)
+            countries = get_all_cached_or_404(Country)
 
             log_info()
         except NoResultFound as error:
@@ -60,6 +63,9 @@ class CountryResource(Resource):
     """Country singular resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get('country')
+    @country_ns.response(304, 'Not modified')
     @country_ns.marshal_with(country_model)
     def get(country_id: int):
         """Returns country object"""
@@ -5,33 +5,48 @@ from flask_restx import Resource
 from sqlalchemy.exc import NoResultFound
 from marshmallow.exceptions import ValidationError
 
-from movie_library import api, db
-from movie_library.models import Director, director_model
+from movie_library import api, db, replica_router
+from movie_library.models import Director, director_model, director_numbered_page_model
 from movie_library.schemes import DirectorSchema
+from movie_library.serializer import fast_marshal
 from movie_library.utils import admin_required, add_model_object, \
     update_model_object, delete_model_object, get_by_id_or_404, \
-    log_error, log_info, log_object_info, parse_query_parameters
+    log_error, log_info, log_object_info, parse_query_parameters, conditional_get, \
+    get_cached_json_response
 
 director_schema = DirectorSchema()
 
 director_ns = api.namespace(name='Director', path='/directors', description='director methods')
 
 
+def marshal_directors(params: dict):
+    """Returns marshalled list of directors or page of directors in count mode"""
+    if 'count' in params:
+        return fast_marshal(Director.get_directors_page_by(params), director_numbered_page_model)
+    return fast_marshal(Director.get_directors_by(params), director_model)
+
+
 @director_ns.route('')
 class DirectorsResource(Resource):
     """Director plural resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get('director')
+    @director_ns.response(304, 'Not modified')
     @director_ns.param('page_size', 'Number of directors on page (default: 10)', type=int)
     @director_ns.param('page', 'Page number (default: 1)', type=int)
     @director_ns.param('q', 'Searching for a director using a substring of the full name')
-    @director_ns.marshal_list_with(director_model)
+    @director_ns.param('count', 'Returns page with total number of directors counted exactly '
+                                'or estimated [exact] [estimated]')
+    @director_ns.response(200, 'Success', [director_model])
     def get():
-        """Returns list of director objects"""
+        """Returns list of director objects or page of director objects in count mode"""
         try:
             params = parse_query_parameters(request.args)
 
-            directors = Director.get_directors_by(params)
+            directors = get_cached_json_response(Director.get_query_key(params),
+                                                 lambda: marshal_directors(params))
 
             log_info()
         except ValueError as error:
@@ -68,6 +83,9 @@ class DirectorResource(Resource):
     """Director singular resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get('director')
+    @director_ns.response(304, 'Not modified')
     @director_ns.marshal_with(director_model)
     def get(director_id: int):
         """Returns director object"""
@@ -5,12 +5,12 @@ from flask_restx import Resource
 from marshmallow.exceptions import ValidationError
 from sqlalchemy.exc import NoResultFound
 
-from movie_library import api, db
+from movie_library import api, db, replica_router
 from movie_library.models import Genre, genre_model
 from movie_library.schemes import GenreSchema
-from movie_library.utils import admin_required, get_by_id_or_404, get_all_or_404, \
+from movie_library.utils import admin_required, get_by_id_or_404, get_all_cached_or_404, \
     add_model_object, update_model_object, delete_model_object, \
-    log_error, log_info, log_object_info
+    log_error, log_info, log_object_info, conditional_get
 
 
 genre_schema = GenreSchema()
@@ -23,11 +23,14 @@ class GenresResource(Resource):
     """Genre plural resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get('genre')
+    @genre_ns.response(304, 'Not modified')
     @genre_ns.marshal_list_with(genre_model)
     def get():
         """Returns list of genre objects"""
         try:
-            genres = get_all_or_404(Genre)
+            genres = get_all_cached_or_404(Genre)
 
             log_info()
         except NoResultFound as error:
@@ -59,6 +62,9 @@ class GenreResource(Resource):
     """Genre singular resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get('genre')
+    @genre_ns.response(304, 'Not modified')
     @genre_ns.marshal_with(genre_model)
     def get(genre_id: int):
         """Returns genre object"""
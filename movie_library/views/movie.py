@@ -1,29 +1,55 @@
 """Movie view module"""
 
-from flask import request, abort
+from flask import request, abort, Response, stream_with_context, current_app
 from flask_restx import Resource
 from flask_login import login_required, current_user
 from sqlalchemy.exc import NoResultFound
 from marshmallow.exceptions import ValidationError
 
-from movie_library import api, db
-from movie_library.models import Movie, movie_model_deserialize, movie_model_serialize
+from movie_library import api, db, replica_router, response_cache
+from movie_library.models import Movie, movie_model_deserialize, movie_model_serialize, \
+    movie_page_model, movie_numbered_page_model, movie_bulk_model, movie_bulk_change_model, \
+    movie_facets_model, MOVIE_LOAD_OPTIONS, CSV_EXPORT_HEADER, MOVIE_FILTER_NAMES
 from movie_library.schemes import MovieSchema
+from movie_library.serializer import fast_marshal
 from movie_library.utils import verify_ownership_by_user_id, OwnershipError, \
     get_by_id_or_404, add_model_object, update_model_object, delete_model_object, \
-    log_error, log_info, log_object_info, parse_query_parameters
+    log_error, log_info, log_object_info, parse_query_parameters, admin_required, \
+    parse_export_parameters, generate_ndjson, generate_csv, conditional_get, \
+    parse_bulk_parameters, parse_bulk_selection, get_cached_json_response, get_versions_key, \
+    facets_cache
 
 movie_schema = MovieSchema()
 
+EXPORT_MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+# tables of movie and its nested objects which make up the response
+# users are left out, the user fields rendered in movies never change after registration,
+# so signups, logins and password changes keep movie validators and cached responses
+MOVIE_TABLES = ('movie', 'movie_genre', 'genre', 'director', 'country', 'age_restriction')
+
 movie_ns = api.namespace(name='Movie', path='/movies', description='movie methods')
 
 
+def marshal_movies(params: dict):
+    """Returns marshalled list of movies or page of movies in cursor or count mode"""
+    if 'count' in params:
+        return fast_marshal(Movie.get_movies_page_by(params), movie_numbered_page_model)
+    if 'cursor' in params:
+        movies, next_cursor = Movie.get_movies_page_by_cursor(params)
+        return fast_marshal({'items': movies, 'next_cursor': next_cursor}, movie_page_model)
+    return fast_marshal(Movie.get_movies_by(params), movie_model_deserialize)
+
+
 @movie_ns.route('')
 class MoviesResource(Resource):
     """Movie plural resource"""
 
     @staticmethod
-    @movie_ns.param('sort', 'Sort parameter [rating;release_date,asc]')
+    @replica_router.read_only
+    @conditional_get(*MOVIE_TABLES)
+    @movie_ns.response(304, 'Not modified')
+    @movie_ns.param('sort', 'Sort parameter, relevance is available with search parameter '
+                            '[rating;release_date,asc] [relevance;rating]')
     @movie_ns.param('genres',
                     'Filter by genres (AND, case insensitive exact match) [Horror,thriller]')
     @movie_ns.param('directors',
@@ -32,13 +58,22 @@ class MoviesResource(Resource):
     @movie_ns.param('page_size', 'Number of movies on page (default: 10)', type=int)
     @movie_ns.param('page', 'Page number (default: 1)', type=int)
     @movie_ns.param('q', 'Movie title search substring')
-    @movie_ns.marshal_list_with(movie_model_deserialize)
+    @movie_ns.param('search', 'Full-text search by words of movie title and description '
+                              '(AND, prefix match) [dark knight]')
+    @movie_ns.param('cursor', 'Keyset pagination cursor, pass an empty value to get '
+                              'the first page and next_cursor of the response to get the next one')
+    @movie_ns.param('count', 'Returns page with total number of movies counted exactly '
+                             'or estimated, not available in cursor mode [exact] [estimated]')
+    @movie_ns.response(200, 'Success', [movie_model_deserialize])
     def get():
-        """Returns list of movie objects"""
+        """Returns list of movie objects or page of movie objects in cursor or count mode"""
         try:
             params = parse_query_parameters(request.args)
 
-            movies = Movie.get_movies_by(params)
+            if 'cursor' in params and 'count' in params:
+                raise ValueError('Parameter count is not supported in cursor mode.')
+            movies = get_cached_json_response(Movie.get_query_key(params),
+                                              lambda: marshal_movies(params))
 
             log_info()
         except ValueError as error:
@@ -58,13 +93,13 @@ class MoviesResource(Resource):
     def post():
         """Creates movie and returns deserialized object"""
         try:
-            genres_ids = Movie.cut_genres_ids_from_request_json(request.json)
+            genres_ids, genres = Movie.cut_genres_from_request_json(request.json)
             request.json['user_id'] = current_user.get_id()
 
             movie = movie_schema.load(request.json, session=db.session)
 
-            if genres_ids is not None:
-                movie.genres = Movie.get_genres_by_genres_ids(genres_ids)
+            if genres is not None:
+                movie.genres = genres
                 request.json['genres'] = genres_ids
 
             add_model_object(movie)
@@ -77,16 +112,174 @@ class MoviesResource(Resource):
             return movie, 201
 
 
+@movie_ns.route('/bulk')
+class MoviesBulkResource(Resource):
+    """Movie bulk resource"""
+
+    @staticmethod
+    @login_required
+    @movie_ns.expect([movie_model_serialize])
+    @movie_ns.param('chunk_size', 'Number of movies added in one transaction '
+                                  '(default: all movies)', type=int)
+    @movie_ns.response(201, 'All movies were successfully created', movie_bulk_model)
+    @movie_ns.response(207, 'Some movies were not created', movie_bulk_model)
+    @movie_ns.response(422, 'No movies were created', movie_bulk_model)
+    def post():
+        """Creates movies and returns result of every item"""
+        try:
+            params = parse_bulk_parameters(request.args, request.json)
+
+            movies, errors = MovieSchema.load_many(request.json, current_user.get_id())
+            ids, database_errors = Movie.add_many(movies, params['chunk_size'])
+            errors.update(database_errors)
+
+            results = [{'index': index, 'status': 201, 'id': ids[index]} if index in ids
+                       else {'index': index, 'status': 409 if index in database_errors else 422,
+                             'errors': errors[index]}
+                       for index in range(len(request.json))]
+            code = 201 if not errors else 207 if ids else 422
+
+            log_info()
+        except ValueError as error:
+            log_error(error)
+            return abort(400, str(error))
+        else:
+            return fast_marshal({'created': len(ids), 'failed': len(errors),
+                                 'results': results}, movie_bulk_model), code
+
+    @staticmethod
+    @login_required
+    @movie_ns.doc(description='Selects movies by ids list or filter object with the same '
+                              'values as movies list query parameters (q, search, '
+                              'release_date_range, directors, genres). Only movies added '
+                              'by current user are changed unless the user is admin. '
+                              'Body: {"ids": [1, 2], "values": {"rating": 8.5}}')
+    @movie_ns.marshal_with(movie_bulk_change_model)
+    def patch():
+        """Updates selected movies by values and returns number of updated movies"""
+        try:
+            selection = parse_bulk_selection(request.json, MOVIE_FILTER_NAMES)
+            values = MovieSchema.load_bulk_values(request.json.get('values'))
+
+            affected = Movie.update_many(selection, values)
+
+            log_info()
+        except ValueError as error:
+            log_error(error)
+            return abort(400, str(error))
+        except ValidationError as error:
+            log_error(error)
+            return abort(422, error.messages)
+        else:
+            return {'affected': affected}
+
+    @staticmethod
+    @login_required
+    @movie_ns.doc(description='Selects movies the same way as patch method. '
+                              'Body: {"filter": {"release_date_range": ",1990-01-01"}}')
+    @movie_ns.marshal_with(movie_bulk_change_model)
+    def delete():
+        """Deletes selected movies and returns number of deleted movies"""
+        try:
+            selection = parse_bulk_selection(request.json, MOVIE_FILTER_NAMES)
+
+            affected = Movie.delete_many(selection)
+
+            log_info()
+        except ValueError as error:
+            log_error(error)
+            return abort(400, str(error))
+        else:
+            return {'affected': affected}
+
+
+@movie_ns.route('/export')
+class MoviesExportResource(Resource):
+    """Movie catalog export resource"""
+
+    @staticmethod
+    @admin_required
+    @movie_ns.param('chunk_size', 'Number of movies fetched at once (default: 500)', type=int)
+    @movie_ns.param('format', 'Export format ndjson or csv (default: ndjson)')
+    @movie_ns.produces(list(EXPORT_MIMETYPES.values()))
+    def get():
+        """Streams all movie objects"""
+        try:
+            params = parse_export_parameters(request.args, tuple(EXPORT_MIMETYPES))
+
+            movies = Movie.iterate_all(params['chunk_size'])
+            if params['format'] == 'csv':
+                rows = generate_csv(movies, movie_model_deserialize, CSV_EXPORT_HEADER,
+                                    Movie.get_csv_export_row)
+            else:
+                rows = generate_ndjson(movies, movie_model_deserialize)
+
+            log_info()
+        except ValueError as error:
+            log_error(error)
+            return abort(400, str(error))
+        else:
+            return Response(stream_with_context(rows), mimetype=EXPORT_MIMETYPES[params['format']],
+                            headers={'Content-Disposition':
+                                     f'attachment; filename=movies.{params["format"]}'})
+
+
+@movie_ns.route('/facets')
+class MovieFacetsResource(Resource):
+    """Movie facets resource"""
+
+    @staticmethod
+    @replica_router.read_only
+    @conditional_get(*MOVIE_TABLES)
+    @movie_ns.response(304, 'Not modified')
+    @movie_ns.param('genres',
+                    'Filter by genres (AND, case insensitive exact match) [Horror,thriller]')
+    @movie_ns.param('directors',
+                    'Filter by substring of directors\' full names (OR, ilike) [Quentin,luc bes]')
+    @movie_ns.param('release_date_range', 'Filter by release date range [2003-01-01,2021-11-16]')
+    @movie_ns.param('q', 'Movie title search substring')
+    @movie_ns.param('search', 'Full-text search by words of movie title and description '
+                              '(AND, prefix match) [dark knight]')
+    @movie_ns.response(200, 'Success', movie_facets_model)
+    def get():
+        """Returns number of filtered movies and their numbers per genre, country,
+        age restriction and release decade, they are cached in the worker when
+        shared response cache is turned off"""
+        try:
+            params = parse_query_parameters(request.args)
+
+            def make_facets() -> dict:
+                return fast_marshal(Movie.get_facets_by(params), movie_facets_model)
+
+            if response_cache.backend is None:
+                facets = facets_cache.get_or_set((*Movie.get_facets_key(params),
+                                                  get_versions_key()),
+                                                 make_facets,
+                                                 current_app.config['FACETS_CACHE_TTL'])
+            else:
+                facets = get_cached_json_response(Movie.get_facets_key(params), make_facets)
+
+            log_info()
+        except ValueError as error:
+            log_error(error)
+            return abort(400, str(error))
+        else:
+            return facets
+
+
 @movie_ns.route('/<int:movie_id>')
 class MovieResource(Resource):
     """Movie singular resource"""
 
     @staticmethod
+    @replica_router.read_only
+    @conditional_get(*MOVIE_TABLES)
+    @movie_ns.response(304, 'Not modified')
     @movie_ns.marshal_with(movie_model_deserialize)
     def get(movie_id: int):
         """Returns movie object"""
         try:
-            movie = get_by_id_or_404(Movie, movie_id)
+            movie = get_by_id_or_404(Movie, movie_id, *MOVIE_LOAD_OPTIONS)
 
             log_info()
         except NoResultFound as error:
@@ -107,12 +300,12 @@ class MovieResource(Resource):
                                         'A movie can only be edited by the user who added it '
                                         'or by the administrator.')
 
-            genres_ids = Movie.cut_genres_ids_from_request_json(request.json)
+            genres_ids, genres = Movie.cut_genres_from_request_json(request.json)
 
             movie = movie_schema.load(request.json, instance=movie,
                                       session=db.session, partial=True)
-            if genres_ids is not None:
-                movie.genres = Movie.get_genres_by_genres_ids(genres_ids)
+            if genres is not None:
+                movie.genres = genres
                 request.json['genres'] = genres_ids
 
             update_model_object()
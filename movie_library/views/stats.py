@@ -0,0 +1,28 @@
+"""Stats view module"""
+
+from flask_restx import Resource
+
+from movie_library import api, pool_metrics, replica_router, response_cache, single_flight
+from movie_library.utils import admin_required, stats_providers, log_info
+
+stats_ns = api.namespace(name='Stats', path='/stats', description='cache statistics methods')
+
+stats_providers['db_pool'] = pool_metrics.stats
+stats_providers['replicas'] = replica_router.stats
+stats_providers['response_cache'] = response_cache.stats
+stats_providers['single_flight'] = single_flight.stats
+
+
+@stats_ns.route('')
+class StatsResource(Resource):
+    """Stats resource"""
+
+    @staticmethod
+    @admin_required
+    def get():
+        """Returns statistics of in-process caches, database pool
+        and replica routing of the current worker"""
+        stats = {name: provider() for name, provider in stats_providers.items()}
+
+        log_info()
+        return stats
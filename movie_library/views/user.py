@@ -1,19 +1,18 @@
 """User view module"""
 
-from datetime import datetime
-
 from flask import request, make_response, abort, current_app
 from flask_login import login_user, current_user, logout_user, login_required
 from flask_restx import Resource
 from marshmallow.exceptions import ValidationError
 from werkzeug.security import generate_password_hash
 
-from movie_library import api, db
+from movie_library import api, db, activity_tracker
 from movie_library.models import login_model, register_model, \
     user_info_model, password_change_model, User
 from movie_library.schemes import LoginSchema, RegisterSchema, PasswordChangeSchema
 from movie_library.utils import AuthenticationError, add_model_object, \
-    unauthorized_required, refresh_and_login_user, log_error, log_info, update_model_object
+    unauthorized_required, refresh_and_login_user, log_error, log_info, update_model_object, \
+    stats_providers, user_cache
 
 login_schema = LoginSchema()
 register_schema = RegisterSchema()
@@ -77,15 +76,18 @@ class UserPasswordChange(Resource):
             new_password1 = request.json.get('new_password1')
             new_password2 = request.json.get('new_password2')
 
+            # current user may come from the cache of this worker, so it is
+            # refreshed to verify the password against the database row
+            user = User.query.populate_existing().get(current_user.id)
+
             password_change_schema.verify_password_with_current(old_password)
             password_change_schema.validate_new_passwords(new_password1, new_password2)
 
-            user = User.query.filter_by(username=current_user.username).first()
-
             hash_pwd = generate_password_hash(new_password1)
             user.password = hash_pwd
 
             update_model_object()
+            user_cache.invalidate(user.id)
 
             log_info()
         except ValidationError as error:
@@ -122,9 +124,13 @@ class UserRegister(Resource):
             return new_user, 201
 
 
+stats_providers['activity_tracker'] = activity_tracker.stats
+
+
 @current_app.before_request
 def update_user_last_activity():
-    """Updates user last_activity field before every request"""
+    """Records user activity before every request, user last_activity field
+    is updated once per LAST_ACTIVITY_FLUSH_INTERVAL seconds"""
     if current_user.is_authenticated:
-        current_user.last_activity = datetime.now()
-        db.session.commit()
+        activity_tracker.record(current_user.id)
+        activity_tracker.flush_if_due()
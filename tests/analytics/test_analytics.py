@@ -0,0 +1,136 @@
+"""Analytics testing module"""
+
+from http import HTTPStatus
+import json
+import pytest
+
+from movie_library import db
+from movie_library.models import MovieAggregate
+from tests.utils import load_json
+from tests.movie.entity_loader import EntityLoader
+
+
+@pytest.fixture(scope='class')
+def load_movies(login_admin, client):
+    """Loads movies with all referenced objects"""
+    EntityLoader.load_genres(client)
+    EntityLoader.load_directors(client)
+    EntityLoader.load_countries(client)
+    EntityLoader.load_age_restrictions(client)
+    movies = load_json('tests/movie/movies.json')
+    movies[3]['age_restriction_id'] = 1
+    client.post('/movies/bulk', data=json.dumps(movies), content_type='application/json')
+
+
+def get_summary(client, dimension: str) -> list:
+    """Gets groups of the dimension as tuples of title, movie count, rounded average
+    rating and total budget"""
+    response = client.get(f'/analytics/{dimension}')
+    assert response.status_code == HTTPStatus.OK, f'[GET] /analytics/{dimension} should return 200'
+    return [(group['title'], group['movie_count'],
+             group['average_rating'] and round(group['average_rating'], 2),
+             group['total_budget']) for group in response.json]
+
+
+def get_aggregates() -> list:
+    """Gets all aggregate rows as tuples"""
+    return [(aggregate.dimension, aggregate.group_id, aggregate.movie_count,
+             aggregate.rated_count, float(aggregate.rating_sum), aggregate.budget_count,
+             aggregate.budget_sum)
+            for aggregate in db.session.query(MovieAggregate).
+            order_by(MovieAggregate.dimension, MovieAggregate.group_id)]
+
+
+def assert_rebuild_equal():
+    """Asserts incrementally maintained aggregates equal aggregates rebuilt from movies"""
+    aggregates = get_aggregates()
+    MovieAggregate.rebuild()
+    db.session.commit()
+    assert get_aggregates() == aggregates
+
+
+@pytest.mark.usefixtures('load_movies')
+class TestAnalytics:
+    """Tests analytics groups follow changes of movies"""
+
+    @staticmethod
+    def test_get_groups_200(client):
+        """Tests groups of created movies"""
+        assert get_summary(client, 'genres') == [('Crime', 3, 9.33, 69650000.0),
+                                                 ('Drama', 2, 8.85, 240000000.0),
+                                                 ('Thriller', 1, 9.6, 6400000.0)]
+        assert get_summary(client, 'directors') == [('Alfred Hitchcock', 2, 9.2, 63250000.0),
+                                                    ('Quentin Tarantino', 1, 8.5, 185000000.0),
+                                                    ('Stanley Kubrick', 1, 9.6, 6400000.0)]
+        assert [group[:2] for group in get_summary(client, 'countries')] == [('United States', 4)]
+        assert [group[:2] for group in get_summary(client, 'years')] == \
+            [('1994', 2), ('1984', 1), ('2008', 1)]
+        assert_rebuild_equal()
+
+    @staticmethod
+    def test_put_movie(client):
+        """Tests updated movie moves between groups"""
+        values = {'genres': [2], 'rating': 7.5, 'release_date': '1994-01-01 00:00:00.000000'}
+        response = client.put('/movies/1', data=json.dumps(values),
+                              content_type='application/json')
+        assert response.status_code == HTTPStatus.OK
+
+        assert get_summary(client, 'genres') == [('Crime', 3, 9.33, 69650000.0),
+                                                 ('Thriller', 2, 8.55, 191400000.0),
+                                                 ('Drama', 1, 9.2, 55000000.0)]
+        assert [group[:2] for group in get_summary(client, 'years')] == \
+            [('1994', 3), ('1984', 1)]
+        assert_rebuild_equal()
+
+    @staticmethod
+    def test_bulk_changes(client):
+        """Tests bulk update and delete change groups of selected movies"""
+        client.patch('/movies/bulk', data=json.dumps({'ids': [2], 'values': {'rating': 5}}),
+                     content_type='application/json')
+        assert get_summary(client, 'directors')[-1] == ('Stanley Kubrick', 1, 5.0, 6400000.0)
+
+        client.patch('/movies/bulk', data=json.dumps({'ids': [2], 'values': {'duration': 1}}),
+                     content_type='application/json')
+        client.delete('/movies/bulk', data=json.dumps({'filter': {'genres': 'thriller'}}),
+                      content_type='application/json')
+        assert get_summary(client, 'genres') == [('Crime', 2, 9.2, 63250000.0),
+                                                 ('Drama', 1, 9.2, 55000000.0)]
+        assert_rebuild_equal()
+
+    @staticmethod
+    def test_delete_objects(client):
+        """Tests groups of deleted movies and genres are removed"""
+        client.delete('/genres/1')
+        assert get_summary(client, 'genres') == [('Crime', 2, 9.2, 63250000.0)]
+
+        client.delete('/movies/4')
+        assert get_summary(client, 'directors') == [('Alfred Hitchcock', 1, 9.2, 55000000.0)]
+        assert_rebuild_equal()
+
+    @staticmethod
+    def test_get_unknown_dimension_404(client):
+        """Tests unknown grouping is not found"""
+        response = client.get('/analytics/users')
+        assert response.status_code == HTTPStatus.NOT_FOUND, \
+            '[GET] /analytics/users should return 404'
+
+
+@pytest.mark.usefixtures('load_movies')
+class TestAnalyticsMovieMove:
+    """Tests analytics groups of movie moved to other director and genres"""
+
+    @staticmethod
+    def test_put_movie_director_and_genres(client):
+        """Tests updated movie leaves groups of its old director and genres"""
+        values = {'director_id': 1, 'genres': [2]}
+        response = client.put('/movies/3', data=json.dumps(values),
+                              content_type='application/json')
+        assert response.status_code == HTTPStatus.OK
+
+        assert get_summary(client, 'directors') == [('Quentin Tarantino', 2, 8.85, 240000000.0),
+                                                    ('Stanley Kubrick', 1, 9.6, 6400000.0),
+                                                    ('Alfred Hitchcock', 1, 9.2, 8250000.0)]
+        assert get_summary(client, 'genres') == [('Thriller', 2, 9.4, 61400000.0),
+                                                 ('Crime', 2, 9.4, 14650000.0),
+                                                 ('Drama', 1, 8.5, 185000000.0)]
+        assert_rebuild_equal()
@@ -0,0 +1,183 @@
+"""Commands testing module"""
+
+import json
+
+from sqlalchemy import event
+
+from movie_library import db
+from movie_library.models import Genre, Director, MovieAggregate, ImportCheckpoint
+from commands import disable_statement_timeout, reset_statement_timeout
+
+
+class TestBulkImport:
+    """Tests db_bulk_import command"""
+
+    @staticmethod
+    def test_import_csv(app, tmp_path):
+        """Tests genres are imported from CSV file in batches"""
+        file_path = tmp_path / 'genres.csv'
+        file_path.write_text('id,title\n1,Drama\n2,Thriller\n3,Crime\n', encoding='utf8')
+
+        result = app.test_cli_runner().invoke(args=['db_bulk_import', 'genres', str(file_path),
+                                                    '--batch-size', '2'])
+
+        assert result.exit_code == 0, result.output
+        assert '3 rows imported' in result.output
+        assert [genre.title for genre in Genre.query.order_by(Genre.id)] == \
+            ['Drama', 'Thriller', 'Crime']
+        assert db.session.query(ImportCheckpoint).count() == 0
+
+    @staticmethod
+    def test_import_jsonl_resume(app, tmp_path):
+        """Tests import from JSONL file is resumed after the last committed batch"""
+        file_path = tmp_path / 'directors.jsonl'
+        file_path.write_text('\n'.join(json.dumps(director) for director in [
+            {'id': 1, 'first_name': 'Quentin', 'last_name': 'Tarantino'},
+            {'id': 2, 'first_name': 'Stanley', 'last_name': 'Kubrick', 'description': None},
+            {'id': 2, 'first_name': 'Alfred', 'last_name': 'Hitchcock'},
+        ]), encoding='utf8')
+        runner = app.test_cli_runner()
+
+        result = runner.invoke(args=['db_bulk_import', 'directors', str(file_path),
+                                     '--batch-size', '2'])
+        assert result.exit_code != 0, 'Duplicate primary key should fail the import'
+        assert ImportCheckpoint.get_committed_rows('director', str(file_path)) == 2
+
+        lines = file_path.read_text(encoding='utf8').splitlines()
+        lines[2] = lines[2].replace('"id": 2', '"id": 3')
+        file_path.write_text('\n'.join(lines), encoding='utf8')
+
+        result = runner.invoke(args=['db_bulk_import', 'directors', str(file_path)])
+        assert result.exit_code == 0, result.output
+        assert 'Resuming import after 2 committed rows' in result.output
+        assert db.session.query(Director.last_name).order_by(Director.id).all() == \
+            [('Tarantino',), ('Kubrick',), ('Hitchcock',)]
+
+    @staticmethod
+    def test_import_copy_error(app, tmp_path, monkeypatch):
+        """Tests failed COPY of PostgreSQL is rolled back and reported for resuming"""
+        file_path = tmp_path / 'genres.csv'
+        file_path.write_text('id,title\n1,Drama\n', encoding='utf8')
+
+        class CopyCursor:
+            """Cursor which COPY fails like the database driver does"""
+            closed = False
+
+            @staticmethod
+            def copy_expert(statement, buffer):
+                raise db.engine.dialect.dbapi.IntegrityError('duplicate key value')
+
+            def close(self):
+                self.closed = True
+
+        cursor = CopyCursor()
+        connection = db.session.connection()
+        monkeypatch.setattr(db.engine.dialect, 'name', 'postgresql')
+        monkeypatch.setattr('commands.disable_statement_timeout', lambda: None)
+        monkeypatch.setattr(ImportCheckpoint, 'get_committed_rows', lambda *args: 0)
+        monkeypatch.setattr(connection.connection, 'cursor', lambda: cursor, raising=False)
+        monkeypatch.setattr(db.session, 'connection', lambda: connection)
+
+        result = app.test_cli_runner().invoke(args=['db_bulk_import', 'genres', str(file_path)])
+        monkeypatch.undo()
+        assert result.exit_code != 0
+        assert 'Batch after row 0 failed, rerun the command to resume' in result.output
+        assert 'duplicate key value' in result.output
+        assert cursor.closed
+        assert db.session.query(ImportCheckpoint).count() == 0
+
+    @staticmethod
+    def test_import_resume_after_crash(app, tmp_path, monkeypatch):
+        """Tests import killed right after a batch commit does not insert the batch again"""
+        file_path = tmp_path / 'genres.csv'
+        file_path.write_text('id,title\n4,Comedy\n5,Horror\n6,Western\n', encoding='utf8')
+        commit = db.session.commit
+
+        def commit_and_crash():
+            commit()
+            raise KeyboardInterrupt
+
+        runner = app.test_cli_runner()
+        monkeypatch.setattr(db.session, 'commit', commit_and_crash)
+        result = runner.invoke(args=['db_bulk_import', 'genres', str(file_path),
+                                     '--batch-size', '2'])
+        monkeypatch.undo()
+        assert result.exit_code != 0
+        assert Genre.query.filter(Genre.id > 3).count() == 2
+
+        result = runner.invoke(args=['db_bulk_import', 'genres', str(file_path),
+                                     '--batch-size', '2'])
+        assert result.exit_code == 0, result.output
+        assert 'Resuming import after 2 committed rows' in result.output
+        assert [genre.title for genre in Genre.query.filter(Genre.id > 3).order_by(Genre.id)] == \
+            ['Comedy', 'Horror', 'Western']
+        assert db.session.query(ImportCheckpoint).count() == 0
+
+    @staticmethod
+    def test_import_movie_genre_rebuilds_analytics(app, tmp_path):
+        """Tests analytics aggregates include links imported bypassing the application"""
+        file_path = tmp_path / 'movie_genre.csv'
+        file_path.write_text('movie_id,genre_id\n', encoding='utf8')
+        db.session.execute(MovieAggregate.__table__.insert().values(
+            dimension='genre', group_id=1, movie_count=1, rated_count=0, rating_sum=0,
+            budget_count=0, budget_sum=0))
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['db_bulk_import', 'movie_genre',
+                                                    str(file_path)])
+        assert result.exit_code == 0, result.output
+        assert 'Analytics aggregates were rebuilt' in result.output
+        assert db.session.query(MovieAggregate).count() == 0
+
+
+class TestRebuildAnalytics:
+    """Tests db_rebuild_analytics command"""
+
+    @staticmethod
+    def test_rebuild(app):
+        """Tests aggregates are recomputed from movies"""
+        db.session.execute(MovieAggregate.__table__.insert().values(
+            dimension='year', group_id=1999, movie_count=5, rated_count=0, rating_sum=0,
+            budget_count=0, budget_sum=0))
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['db_rebuild_analytics'])
+        assert result.exit_code == 0, result.output
+        assert '0 groups' in result.output
+        assert db.session.query(MovieAggregate).count() == 0
+
+
+class TestStatementTimeout:
+    """Tests long running commands are not cancelled by statement timeout"""
+
+    @staticmethod
+    def test_disable_statement_timeout(monkeypatch):
+        """Tests checked out PostgreSQL connections reset statement timeout once registered"""
+        disable_statement_timeout()
+        assert not event.contains(db.engine, 'checkout', reset_statement_timeout)
+
+        monkeypatch.setattr(db.engine.dialect, 'name', 'postgresql')
+        disable_statement_timeout()
+        disable_statement_timeout()
+        assert event.contains(db.engine, 'checkout', reset_statement_timeout)
+        event.remove(db.engine, 'checkout', reset_statement_timeout)
+
+        class Cursor:
+            """Cursor which remembers executed statements"""
+            statements = []
+
+            def execute(self, statement):
+                self.statements.append(statement)
+
+            def close(self):
+                pass
+
+        class Connection:
+            """Connection which gives the remembering cursor"""
+
+            @staticmethod
+            def cursor():
+                return Cursor()
+
+        reset_statement_timeout(Connection(), None, None)
+        assert Cursor.statements == ['SET statement_timeout = 0']
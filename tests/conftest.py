@@ -2,8 +2,9 @@
 
 import pytest
 
-from movie_library import create_app, db
+from movie_library import create_app, db, response_cache
 from tests.utils import create_superuser, create_user, create_another_user, login_user, logout_user
+from movie_library.utils import reference_cache, user_cache, count_cache, facets_cache
 
 
 @pytest.fixture(scope='session')
@@ -26,6 +27,11 @@ def client(app):
 
     db.session.remove()
     db.drop_all(app=app)
+    reference_cache.clear()
+    user_cache.clear()
+    count_cache.clear()
+    facets_cache.clear()
+    response_cache.clear()
 
 
 @pytest.fixture(scope='class')
@@ -107,6 +107,25 @@ class TestDirectorsAdmin:
         assert response.json['first_name'] == first_name
         assert response.json['last_name'] == last_name
 
+    @staticmethod
+    def test_get_search_by_full_name(client):
+        """Tests get method searches by updated full name"""
+        response = client.get('/directors?q=n ivan')
+        assert response.status_code == HTTPStatus.OK, \
+            '[GET] /directors?q=n ivan should return 200'
+        assert response.json[0]['last_name'] == 'Ivanov'
+        assert 'full_name' not in response.json[0]
+
+    @staticmethod
+    @pytest.mark.parametrize('count', ['exact', 'estimated'])
+    def test_get_count(client, count):
+        """Tests get method in count mode returns page with total"""
+        response = client.get(f'/directors?count={count}&q=ivan')
+        assert response.status_code == HTTPStatus.OK, \
+            f'[GET] /directors?count={count}&q=ivan should return 200'
+        assert response.json == {'items': response.json['items'], 'total': 1,
+                                 'has_next': False, 'next_page': None}
+
     @staticmethod
     def test_delete_admin_204(client):
         """Tests delete method by admin"""
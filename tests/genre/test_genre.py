@@ -4,6 +4,8 @@ from http import HTTPStatus
 import json
 import pytest
 
+from movie_library import db
+from movie_library.models import Genre, TableVersion
 from tests.utils import load_json
 
 
@@ -110,3 +112,35 @@ class TestGenresAdmin:
         response = client.delete('/genres/1')
         assert response.status_code == HTTPStatus.NO_CONTENT, \
             '[DELETE] /genres/1 by user should return 204'
+
+    @staticmethod
+    def test_get_cached_admin_200(client, genres):
+        """Tests get method is served from reference cache and invalidated on change"""
+        genre_id = client.post('/genres', data=json.dumps(genres[1]),
+                               content_type='application/json').json['id']
+        hits = client.get('/stats').json['reference_cache']['hits']
+
+        client.get('/genres')
+        response = client.get('/genres')
+        assert response.status_code == HTTPStatus.OK, \
+            '[GET] /genres with not empty table should return 200'
+        assert [genre['title'] for genre in response.json] == [genres[1]['title']]
+        assert client.get('/stats').json['reference_cache']['hits'] == hits + 1
+
+        client.put(f'/genres/{genre_id}', data=json.dumps({'title': 'Comedy'}),
+                   content_type='application/json')
+        response = client.get('/genres')
+        assert [genre['title'] for genre in response.json] == ['Comedy']
+
+    @staticmethod
+    def test_get_cached_changed_by_another_process(client):
+        """Tests get method reloads reference cache older than the table version"""
+        client.get('/genres')
+
+        genre = Genre.query.first()
+        genre.title = 'Drama'
+        TableVersion.bump(['genre'])
+        db.session.commit()
+
+        response = client.get('/genres')
+        assert [genre['title'] for genre in response.json] == ['Drama']
@@ -0,0 +1,52 @@
+"""Log testing module"""
+
+import logging
+from queue import Queue
+
+from movie_library import log
+from movie_library.log import BoundedQueueHandler
+
+
+class TestBoundedQueueHandler:
+    """Tests queue handler full queue policies"""
+
+    @staticmethod
+    def make_record(message: str) -> logging.LogRecord:
+        """Makes log record with lazily formatted message"""
+        return logging.LogRecord('test', logging.INFO, __file__, 0, '%s', (message,), None)
+
+    def test_drop_policy(self):
+        """Tests records are dropped when queue is full"""
+        handler = BoundedQueueHandler(Queue(2), 'drop')
+        for message in ('first', 'second', 'third'):
+            handler.handle(self.make_record(message))
+
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 1
+
+    def test_block_policy(self):
+        """Tests record is dropped after block timeout when queue is still full"""
+        handler = BoundedQueueHandler(Queue(1), 'block', block_timeout=0.01)
+        handler.handle(self.make_record('first'))
+        handler.handle(self.make_record('second'))
+
+        assert handler.dropped == 1
+
+    def test_message_formatted_by_listener(self):
+        """Tests message arguments are not merged in calling thread"""
+        handler = BoundedQueueHandler(Queue(1))
+        handler.handle(self.make_record('message'))
+
+        record = handler.queue.get_nowait()
+        assert record.msg == '%s'
+        assert record.getMessage() == 'message'
+
+
+class TestLogStats:
+    """Tests log stats of testing config"""
+
+    @staticmethod
+    def test_sync_mode(client):
+        """Tests testing config uses synchronous file handler"""
+        assert log.stats() == {'async': False}
+        assert isinstance(log.logger.handlers[0], logging.FileHandler)
@@ -21,3 +21,18 @@ class EntityLoader:
         directors = load_json('tests/director/directors.json')
         for director in directors:
             client.post('/directors', data=json.dumps(director), content_type='application/json')
+
+    @staticmethod
+    def load_countries(client):
+        """Loads country objects"""
+        countries = load_json('tests/country/countries.json')
+        for country in countries:
+            client.post('/countries', data=json.dumps(country), content_type='application/json')
+
+    @staticmethod
+    def load_age_restrictions(client):
+        """Loads age restriction objects"""
+        age_restrictions = load_json('tests/age_restriction/age_restrictions.json')
+        for age_restriction in age_restrictions:
+            client.post('/age_restrictions', data=json.dumps(age_restriction),
+                        content_type='application/json')
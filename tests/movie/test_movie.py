@@ -1,10 +1,14 @@
 """Movie testing module"""
 
 from http import HTTPStatus
+import csv
 import json
 import pytest
 
-from tests.utils import login_user, logout_user, load_json
+from movie_library import db, response_cache
+from movie_library.models import User, TableVersion, movie_genre
+from movie_library.utils import commit_changes, facets_cache
+from tests.utils import login_user, logout_user, load_json, count_queries
 from tests.movie.entity_loader import EntityLoader
 
 
@@ -21,6 +25,13 @@ def load_background_entities(login_admin, client):
     EntityLoader.load_directors(client)
 
 
+@pytest.fixture(scope='class')
+def load_referenced_entities(load_background_entities, client):
+    """Loads all model objects referenced by movies"""
+    EntityLoader.load_countries(client)
+    EntityLoader.load_age_restrictions(client)
+
+
 class TestMoviesUnauthorized:
     """Tests movie methods by unauthorized user"""
 
@@ -54,6 +65,21 @@ class TestMoviesUnauthorized:
         assert response.status_code == HTTPStatus.UNAUTHORIZED, \
             '[PUT] /movies/1 by unauthorized user should return 401'
 
+    @staticmethod
+    def test_export_unauthorized_403(client):
+        """Tests export method by unauthorized user"""
+        response = client.get('/movies/export')
+        assert response.status_code == HTTPStatus.FORBIDDEN, \
+            '[GET] /movies/export by unauthorized user should return 403'
+
+    @staticmethod
+    def test_post_bulk_unauthorized_401(client, movies):
+        """Tests bulk post method by unauthorized user"""
+        response = client.post('/movies/bulk', data=json.dumps(movies),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, \
+            '[POST] /movies/bulk by unauthorized user should return 401'
+
     @staticmethod
     def test_delete_unauthorized_401(client):
         """Tests delete method by unauthorized user"""
@@ -101,6 +127,39 @@ class TestMoviesAuthorized:
             '[PUT] /movies/1 by authorized user should return 200'
         assert response.json['title'] == value
 
+    @staticmethod
+    @pytest.mark.parametrize('path', ['/movies', '/movies/1'])
+    def test_get_conditional_304(client, path):
+        """Tests get method returns 304 for current validators and 200 after change"""
+        response = client.get(path)
+        etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+
+        response = client.get(path, headers={'If-None-Match': etag})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, \
+            f'[GET] {path} with current ETag should return 304'
+        assert response.data == b''
+        response = client.get(path, headers={'If-Modified-Since': last_modified})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, \
+            f'[GET] {path} with current Last-Modified should return 304'
+
+        client.put('/movies/1', data=json.dumps({'genres': []}),
+                   content_type='application/json')
+        response = client.get(path, headers={'If-None-Match': etag})
+        assert response.status_code == HTTPStatus.OK, \
+            f'[GET] {path} with ETag older than the change should return 200'
+        assert response.headers['ETag'] != etag
+
+    @staticmethod
+    def test_get_conditional_user_change_304(client):
+        """Tests changes of users do not invalidate movie validators"""
+        etag = client.get('/movies').headers['ETag']
+        db.session.add(User(username='newcomer', email='newcomer@mail.com', password='hash'))
+        commit_changes()
+
+        response = client.get('/movies', headers={'If-None-Match': etag})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, \
+            '[GET] /movies after user registration should return 304'
+
     @staticmethod
     def test_delete_authorized_204(client):
         """Tests delete method on filled table by authorized user"""
@@ -171,6 +230,17 @@ class TestMoviesQueryParameters:
             '[POST] /movies by authorized user should return 201'
         assert response.json['title'] == value
 
+    @staticmethod
+    def test_post_missing_genres_422(client, movies):
+        """Tests post method reports every missing genre at once"""
+        movies[0]['genres'] = [1, 98, 99]
+        response = client.post('/movies', data=json.dumps(movies[0]),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY, \
+            '[POST] /movies with missing genres should return 422'
+        assert response.json['message']['genres'] == ['Genre index 98 does not exist.',
+                                                      'Genre index 99 does not exist.']
+
     @staticmethod
     def test_get(client):
         """Tests get method on filled table"""
@@ -179,6 +249,25 @@ class TestMoviesQueryParameters:
             '[GET] /movies?q=ter should return 200 with one movie in dictionary'
         assert len(response.json) == 4
 
+    @staticmethod
+    def test_get_query_count(client):
+        """Tests get method loads a page in a constant number of queries"""
+        with count_queries(db) as one_movie_queries:
+            response = client.get('/movies?page_size=1')
+        assert len(response.json) == 1
+
+        with count_queries(db) as four_movies_queries:
+            response = client.get('/movies?page_size=4')
+        assert len(response.json) == 4
+
+        assert len(one_movie_queries) == len(four_movies_queries), \
+            '[GET] /movies should not issue a query per marshalled movie'
+
+        with count_queries(db) as movie_queries:
+            client.get('/movies/1')
+        assert len(movie_queries) == len(one_movie_queries), \
+            '[GET] /movies/1 should load nested objects the same way as /movies'
+
     @staticmethod
     def test_get_search(client):
         """Tests get method with search query parameter"""
@@ -188,6 +277,24 @@ class TestMoviesQueryParameters:
         assert response.json[0]['title'] == 'Terminator'
         assert len(response.json) == 1
 
+    @staticmethod
+    @pytest.mark.parametrize('search,titles', [('gump', ['Forrest Gump']),
+                                               ('TARANTINO quent', ['Pulp Fiction']),
+                                               ('dark knight', ['The Dark Knight', 'Terminator'])])
+    def test_get_full_text_search(client, search, titles):
+        """Tests get method with full-text search query parameter sorted by relevance"""
+        response = client.get(f'/movies?search={search}&sort=relevance')
+        assert response.status_code == HTTPStatus.OK, \
+            f'[GET] /movies?search={search}&sort=relevance should return 200'
+        assert [movie['title'] for movie in response.json] == titles
+
+    @staticmethod
+    def test_get_relevance_without_search_400(client):
+        """Tests get method with relevance sorting and without search query parameter"""
+        response = client.get('/movies?sort=relevance')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, \
+            '[GET] /movies?sort=relevance should return 400'
+
     @staticmethod
     def test_get_pagination(client):
         """Tests get method with pagination query parameters"""
@@ -223,6 +330,35 @@ class TestMoviesQueryParameters:
         assert response.json[3]['rating'] == 8.5
         assert len(response.json) == 4
 
+    @staticmethod
+    def test_export_ndjson(client):
+        """Tests export of all movies as JSON lines"""
+        response = client.get('/movies/export?chunk_size=3')
+        assert response.status_code == HTTPStatus.OK, \
+            '[GET] /movies/export by admin should return 200'
+        assert response.mimetype == 'application/x-ndjson'
+        movies = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert movies == client.get('/movies').json
+
+    @staticmethod
+    def test_export_csv(client):
+        """Tests export of all movies as CSV"""
+        response = client.get('/movies/export?format=csv')
+        assert response.status_code == HTTPStatus.OK, \
+            '[GET] /movies/export?format=csv by admin should return 200'
+        rows = list(csv.reader(response.data.decode().splitlines()))
+        assert rows[0][:3] == ['id', 'title', 'release_date']
+        assert [row[1] for row in rows[1:]] == ['The Dark Knight', 'Terminator',
+                                                'Forrest Gump', 'Pulp Fiction']
+        assert rows[2][-1] == 'Thriller|Crime'
+
+    @staticmethod
+    def test_export_invalid_format_400(client):
+        """Tests export with unknown format"""
+        response = client.get('/movies/export?format=xml')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, \
+            '[GET] /movies/export?format=xml should return 400'
+
     @staticmethod
     def test_get_by_directors(client):
         """Tests get method with director query parameters"""
@@ -235,3 +371,411 @@ class TestMoviesQueryParameters:
         """Tests get method with genres query parameters"""
         response = client.get('/movies?genres=Drama,crime')
         assert response.json[0]['title'] == 'Forrest Gump'
+
+    @staticmethod
+    @pytest.mark.parametrize('sort', ['rating;release_date,asc', 'release_date,desc', ''])
+    def test_get_cursor_pagination(client, sort):
+        """Tests get method in cursor mode matches offset pagination"""
+        expected = [movie['title'] for movie in client.get(f'/movies?sort={sort}').json]
+
+        titles = []
+        response = client.get(f'/movies?sort={sort}&page_size=1&cursor=')
+        while True:
+            assert response.status_code == HTTPStatus.OK, \
+                f'[GET] /movies?sort={sort}&page_size=1&cursor= should return 200'
+            titles.extend(movie['title'] for movie in response.json['items'])
+            if response.json['next_cursor'] is None:
+                break
+            response = client.get(f'/movies?sort={sort}&page_size=1'
+                                  f'&cursor={response.json["next_cursor"]}')
+
+        assert titles == expected
+
+    @staticmethod
+    def test_get_cursor_invalid_400(client):
+        """Tests get method with invalid or mismatched cursor"""
+        response = client.get('/movies?cursor=invalid')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, \
+            '[GET] /movies?cursor=invalid should return 400'
+
+        next_cursor = client.get('/movies?page_size=1&cursor=').json['next_cursor']
+        response = client.get(f'/movies?sort=rating&cursor={next_cursor}')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, \
+            '[GET] /movies with cursor of another sort should return 400'
+
+    @staticmethod
+    @pytest.mark.parametrize('count', ['exact', 'estimated'])
+    @pytest.mark.parametrize('params,total', [('', 4), ('genres=crime', 3), ('q=ter', 1)])
+    def test_get_count(client, count, params, total):
+        """Tests get method in count mode returns page with total and next page"""
+        response = client.get(f'/movies?page_size=1&count={count}&{params}')
+        assert response.status_code == HTTPStatus.OK, \
+            f'[GET] /movies?page_size=1&count={count}&{params} should return 200'
+        assert len(response.json['items']) == 1
+        assert response.json['total'] == total
+        assert response.json['has_next'] == (total > 1)
+        assert response.json['next_page'] == (2 if total > 1 else None)
+
+        response = client.get(f'/movies?page={total}&page_size=1&count={count}&{params}')
+        assert response.json['total'] == total
+        assert response.json['has_next'] is False
+        assert response.json['next_page'] is None
+
+    @staticmethod
+    def test_get_count_invalid_400(client):
+        """Tests get method with invalid count mode or count in cursor mode"""
+        response = client.get('/movies?count=approximate')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, \
+            '[GET] /movies?count=approximate should return 400'
+
+        response = client.get('/movies?count=exact&cursor=')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, \
+            '[GET] /movies?count=exact&cursor= should return 400'
+
+    @staticmethod
+    @pytest.mark.parametrize('path', ['/movies?sort=rating', '/movies?page_size=2&count=exact',
+                                      '/movies?page_size=2&cursor=', '/directors',
+                                      '/directors?count=estimated', '/movies/export'])
+    def test_get_compiled_serializer(client, monkeypatch, path):
+        """Tests compiled serializer output is byte-identical to flask-restx marshalling"""
+        login_user(client, login='admin', password='admin')
+        compiled_response = client.get(path)
+        monkeypatch.setitem(client.application.config, 'COMPILED_SERIALIZER', False)
+        marshal_response = client.get(path)
+        logout_user(client)
+
+        assert compiled_response.status_code == HTTPStatus.OK, f'[GET] {path} should return 200'
+        assert compiled_response.data == marshal_response.data
+
+    @staticmethod
+    @pytest.mark.parametrize('params,titles', [
+        ('genres=crime&sort=rating;release_date,asc',
+         ['Terminator', 'Pulp Fiction', 'Forrest Gump']),
+        ('genres=Crime,THRILLER&q=term', ['Terminator']),
+        ('genres=crime&release_date_range=1990-01-01,', ['Forrest Gump', 'Pulp Fiction']),
+    ])
+    def test_get_by_genres_combined(client, params, titles):
+        """Tests get method with genres combined with other query parameters"""
+        response = client.get(f'/movies?{params}')
+        assert response.status_code == HTTPStatus.OK, \
+            f'[GET] /movies?{params} should return 200'
+        assert [movie['title'] for movie in response.json] == titles
+
+    @staticmethod
+    def test_get_by_unknown_genre_404(client):
+        """Tests get method with not existing genre"""
+        response = client.get('/movies?genres=crime,western')
+        assert response.status_code == HTTPStatus.NOT_FOUND, \
+            '[GET] /movies?genres=crime,western should return 404'
+
+    @staticmethod
+    def test_get_by_directors_full_name(client):
+        """Tests get method with several director full name substrings"""
+        response = client.get('/movies?directors=quentin,stanley kub')
+        assert response.status_code == HTTPStatus.OK, \
+            '[GET] /movies?directors=quentin,stanley kub should return 200'
+        assert [movie['title'] for movie in response.json] == ['The Dark Knight', 'Terminator']
+
+
+@pytest.mark.usefixtures('load_referenced_entities')
+class TestMoviesBulk:
+    """Tests movie bulk creation"""
+
+    @staticmethod
+    def test_post_bulk_partial_207(client, movies):
+        """Tests bulk post method creates valid movies and reports invalid ones"""
+        items = [movies[0], dict(movies[1], title=''), dict(movies[2], director_id=99),
+                 dict(movies[2], genres=[1, 98, 99]), 'movie',
+                 dict(movies[3], age_restriction_id=1)]
+        response = client.post('/movies/bulk', data=json.dumps(items),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS, \
+            '[POST] /movies/bulk with some invalid movies should return 207'
+        assert response.json['created'] == 2
+        assert response.json['failed'] == 4
+
+        results = response.json['results']
+        assert [result['status'] for result in results] == [201, 422, 422, 422, 422, 201]
+        assert list(results[1]['errors']) == ['title']
+        assert results[2]['errors'] == {'director_id': ['Director index 99 does not exist.']}
+        assert results[3]['errors'] == {'genres': ['Genre index 98 does not exist.',
+                                                   'Genre index 99 does not exist.']}
+
+        movie = client.get(f'/movies/{results[5]["id"]}').json
+        assert movie['title'] == movies[3]['title']
+        assert [genre['id'] for genre in movie['genres']] == movies[3]['genres']
+
+    @staticmethod
+    def test_post_bulk_repeated_genres_201(client, movies):
+        """Tests bulk post method links repeated genre of a movie once"""
+        items = [dict(movies[2], genres=[3, 1, 3]), movies[0]]
+        response = client.post('/movies/bulk', data=json.dumps(items),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.CREATED, \
+            '[POST] /movies/bulk with repeated genre ids should return 201'
+        assert response.json['created'] == 2
+        assert response.json['failed'] == 0
+
+        movie = client.get(f'/movies/{response.json["results"][0]["id"]}').json
+        assert sorted(genre['id'] for genre in movie['genres']) == [1, 3]
+
+    @staticmethod
+    def test_post_bulk_chunks_201(client, movies):
+        """Tests bulk post method creates all movies by chunks"""
+        movies[3]['age_restriction_id'] = 1
+        response = client.post('/movies/bulk?chunk_size=3', data=json.dumps(movies),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.CREATED, \
+            '[POST] /movies/bulk?chunk_size=3 with valid movies should return 201'
+        ids = [result['id'] for result in response.json['results']]
+        assert ids == sorted(ids)
+        assert [client.get(f'/movies/{id_}').json['title'] for id_ in ids] == \
+            [movie['title'] for movie in movies]
+
+    @staticmethod
+    def test_post_bulk_invalid_422(client, movies):
+        """Tests bulk post method with only invalid movies"""
+        response = client.post('/movies/bulk', data=json.dumps([dict(movies[0], id=1)]),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY, \
+            '[POST] /movies/bulk with invalid movies should return 422'
+        assert response.json['results'][0]['errors'] == {'id': ['Unknown field.']}
+
+    @staticmethod
+    @pytest.mark.parametrize('query,body', [('', []), ('', {}), ('?chunk_size=0', [{}])])
+    def test_post_bulk_400(client, query, body):
+        """Tests bulk post method with invalid body or chunk size"""
+        response = client.post(f'/movies/bulk{query}', data=json.dumps(body),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, \
+            f'[POST] /movies/bulk{query} with {body} should return 400'
+
+    @staticmethod
+    def test_patch_bulk_by_ids_200(client):
+        """Tests bulk patch method updates movies selected by ids"""
+        ids = [movie['id'] for movie in client.get('/movies?q=terminator').json]
+        response = client.patch('/movies/bulk', data=json.dumps({'ids': ids + [999],
+                                                                 'values': {'rating': 7.25}}),
+                                content_type='application/json')
+        assert response.status_code == HTTPStatus.OK, \
+            '[PATCH] /movies/bulk by admin should return 200'
+        assert response.json == {'affected': len(ids)}
+        assert {movie['rating'] for movie in client.get('/movies?q=terminator').json} == {7.25}
+
+    @staticmethod
+    @pytest.mark.parametrize('values', [{'rating': 11}, {'genres': [1]}, {'director_id': 99},
+                                        {}])
+    def test_patch_bulk_invalid_values_422(client, values):
+        """Tests bulk patch method with invalid values"""
+        response = client.patch('/movies/bulk', data=json.dumps({'ids': [1], 'values': values}),
+                                content_type='application/json')
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY, \
+            f'[PATCH] /movies/bulk with values {values} should return 422'
+
+    @staticmethod
+    @pytest.mark.parametrize('body', [{'ids': [1], 'filter': {'q': 'term'}}, {'ids': []},
+                                      {'filter': {'q': ''}}, {'filter': {'user_id': '1'}},
+                                      {'filter': {'release_date_range': 'yesterday,'}}])
+    def test_delete_bulk_invalid_selection_400(client, body):
+        """Tests bulk delete method with invalid selection"""
+        response = client.delete('/movies/bulk', data=json.dumps(body),
+                                 content_type='application/json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, \
+            f'[DELETE] /movies/bulk with {body} should return 400'
+
+    @staticmethod
+    def test_bulk_by_another_user(client, movies):
+        """Tests bulk methods change only movies added by current user"""
+        movies_number = len(client.get('/movies?page_size=50').json)
+        logout_user(client)
+        login_user(client)
+        client.post('/movies', data=json.dumps(dict(movies[0], title='Own movie')),
+                    content_type='application/json')
+
+        response = client.patch('/movies/bulk', data=json.dumps(
+            {'filter': {'release_date_range': '1900-01-01,'}, 'values': {'duration': 1}}),
+                                content_type='application/json')
+        assert response.json == {'affected': 1}
+        response = client.delete('/movies/bulk', data=json.dumps(
+            {'ids': list(range(1, movies_number + 2))}), content_type='application/json')
+        assert response.json == {'affected': 1}
+
+        logout_user(client)
+        login_user(client, login='admin', password='admin')
+        assert len(client.get('/movies?page_size=50').json) == movies_number
+
+    @staticmethod
+    def test_delete_bulk_by_filter_200(client):
+        """Tests bulk delete method deletes movies selected by filter with their genres"""
+        ids = [movie['id'] for movie in client.get('/movies?genres=crime').json]
+        response = client.delete('/movies/bulk', data=json.dumps({'filter': {'genres': 'crime'}}),
+                                 content_type='application/json')
+        assert response.status_code == HTTPStatus.OK, \
+            '[DELETE] /movies/bulk by admin should return 200'
+        assert response.json == {'affected': len(ids)}
+        assert client.get('/movies?genres=crime').status_code == HTTPStatus.NOT_FOUND
+        assert db.session.query(movie_genre).filter(movie_genre.c.movie_id.in_(ids)).count() == 0
+
+
+@pytest.mark.usefixtures('load_referenced_entities')
+class TestMoviesResponseCache:
+    """Tests movie list responses are cached by canonical query and table versions"""
+
+    @staticmethod
+    def test_equal_queries_hit(client, movies):
+        """Tests queries differing in parameter order, case and genre order share response"""
+        movies[3]['age_restriction_id'] = 1
+        client.post('/movies/bulk', data=json.dumps(movies), content_type='application/json')
+
+        hits = response_cache.stats()['hits']
+        first_response = client.get('/movies?genres=Drama,Crime&sort=rating&page_size=5')
+        second_response = client.get('/movies?page_size=5&sort=rating&genres=crime,drama')
+        assert response_cache.stats()['hits'] == hits + 1
+        assert second_response.data == first_response.data
+        assert second_response.headers['Content-Type'] == 'application/json'
+        assert second_response.headers['Cache-Control'] == 'private, no-cache'
+        assert [movie['title'] for movie in second_response.json] == ['Forrest Gump']
+
+    @staticmethod
+    @pytest.mark.parametrize('query, status', [('sort=%20rating', HTTPStatus.BAD_REQUEST),
+                                               ('sort=rating&q=gump%20', HTTPStatus.NOT_FOUND)])
+    def test_whitespace_not_normalized(client, query, status):
+        """Tests values with extra whitespace do not hit response of the trimmed values"""
+        assert client.get('/movies?sort=rating&q=gump').status_code == HTTPStatus.OK
+        response = client.get(f'/movies?{query}')
+        assert response.status_code == status, f'[GET] /movies?{query} should return {status}'
+
+    @staticmethod
+    def test_hot_key_refreshed_after_write(client, monkeypatch):
+        """Tests requested list is made for new table versions in background after a write"""
+        monkeypatch.setattr(response_cache, 'hot_keys_number', 1)
+        monkeypatch.setattr(response_cache, 'start_refresher', lambda: None)
+        movie_id = client.get('/movies?page_size=3').json[0]['id']
+        response_cache.refresh_hot_keys()
+        refreshes = response_cache.stats()['refreshes']
+
+        client.put(f'/movies/{movie_id}', data=json.dumps({'title': 'Refreshed'}),
+                   content_type='application/json')
+        response_cache.refresh_hot_keys()
+        assert response_cache.stats()['refreshes'] == refreshes + 1
+
+        hits = response_cache.stats()['hits']
+        response = client.get('/movies?page_size=3')
+        assert response_cache.stats()['hits'] == hits + 1
+        assert response.json[0]['title'] == 'Refreshed'
+
+    @staticmethod
+    def test_bad_request_not_refreshed(client, monkeypatch):
+        """Tests rejected request is not refreshed in background and does not stop
+        refresh of successful ones"""
+        monkeypatch.setattr(response_cache, 'hot_keys_number', 5)
+        monkeypatch.setattr(response_cache, 'start_refresher', lambda: None)
+        response_cache.refresh_hot_keys()
+        hot_keys = response_cache.stats()['hot_keys']
+        response = client.get('/movies?sort=relevance;rating')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response_cache.stats()['hot_keys'] == hot_keys
+        movie_id = client.get('/movies?page_size=2').json[0]['id']
+        stats = response_cache.stats()
+
+        client.put(f'/movies/{movie_id}', data=json.dumps({'title': 'Refreshed again'}),
+                   content_type='application/json')
+        response_cache.refresh_hot_keys()
+        assert response_cache.stats()['refresh_errors'] == stats['refresh_errors']
+
+        hits = response_cache.stats()['hits']
+        response = client.get('/movies?page_size=2')
+        assert response_cache.stats()['hits'] == hits + 1
+        assert response.json[0]['title'] == 'Refreshed again'
+
+    @staticmethod
+    def test_cache_control(client):
+        """Tests anonymous responses are public and short-lived, others are private"""
+        logout_user(client)
+        response = client.get('/movies?page_size=5')
+        assert response.headers['Cache-Control'] == \
+            'public, max-age=5, stale-while-revalidate=30'
+        assert response.headers['Vary'] == 'Cookie'
+        not_modified = client.get('/movies?page_size=5',
+                                  headers={'If-None-Match': response.headers['ETag']})
+        assert not_modified.headers['Cache-Control'] == response.headers['Cache-Control']
+
+        login_user(client, login='admin', password='admin')
+        response = client.get('/movies/1')
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    @staticmethod
+    def test_write_invalidates(client):
+        """Tests response cached before a write is not returned after it"""
+        client.get('/movies?page_size=5')
+        movie_id = client.get('/movies?page_size=5').json[0]['id']
+        client.put(f'/movies/{movie_id}', data=json.dumps({'title': 'Changed'}),
+                   content_type='application/json')
+
+        hits = response_cache.stats()['hits']
+        response = client.get('/movies?page_size=5')
+        assert response_cache.stats()['hits'] == hits
+        assert 'Changed' in [movie['title'] for movie in response.json]
+
+
+@pytest.mark.usefixtures('load_referenced_entities')
+class TestMovieFacets:
+    """Tests facet counts of filtered movies"""
+
+    @staticmethod
+    def test_get_facets_200(client, movies):
+        """Tests numbers of all movies per facet value"""
+        movies[3]['age_restriction_id'] = 1
+        client.post('/movies/bulk', data=json.dumps(movies), content_type='application/json')
+
+        response = client.get('/movies/facets')
+        assert response.status_code == HTTPStatus.OK, '[GET] /movies/facets should return 200'
+        assert response.json['total'] == 4
+        assert [(genre['title'], genre['count']) for genre in response.json['genres']] == \
+            [('Crime', 3), ('Drama', 2), ('Thriller', 1)]
+        assert [(country['id'], country['count'])
+                for country in response.json['countries']] == [(1, 4)]
+        assert [(age_restriction['id'], age_restriction['count'])
+                for age_restriction in response.json['age_restrictions']] == [(1, 3), (2, 1)]
+        assert response.json['decades'] == [{'decade': 1980, 'count': 1},
+                                            {'decade': 1990, 'count': 2},
+                                            {'decade': 2000, 'count': 1}]
+
+    @staticmethod
+    def test_get_filtered_facets_cached(client):
+        """Tests facets of filtered movies are cached by normalized filters"""
+        response = client.get('/movies/facets?genres=crime&release_date_range=1990-01-01,')
+        assert response.json['total'] == 2
+        assert [(genre['title'], genre['count']) for genre in response.json['genres']] == \
+            [('Crime', 2), ('Drama', 1)]
+
+        hits = response_cache.stats()['hits']
+        cached_response = client.get('/movies/facets?release_date_range=1990-01-01,&genres=CRIME')
+        assert cached_response.data == response.data
+        assert response_cache.stats()['hits'] == hits + 1
+
+    @staticmethod
+    def test_get_facets_cached_in_worker(client, monkeypatch):
+        """Tests facets are cached in the worker when response cache is turned off
+        and are read again after table versions move"""
+        monkeypatch.setattr(response_cache, 'backend', None)
+        response = client.get('/movies/facets?genres=drama')
+        assert response.json['total'] == 2
+
+        stats = facets_cache.stats()
+        cached_response = client.get('/movies/facets?genres=DRAMA')
+        assert cached_response.json == response.json
+        assert facets_cache.stats()['hits'] == stats['hits'] + 1
+
+        TableVersion.bump(['movie'])
+        db.session.commit()
+        client.get('/movies/facets?genres=drama')
+        assert facets_cache.stats()['misses'] == stats['misses'] + 1
+
+    @staticmethod
+    def test_get_facets_nothing_found(client):
+        """Tests facets of filter without movies are empty"""
+        response = client.get('/movies/facets?q=missing')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json == {'total': 0, 'genres': [], 'countries': [],
+                                 'age_restrictions': [], 'decades': []}
@@ -0,0 +1 @@
+"""Nginx proxy cache tests"""
@@ -0,0 +1,130 @@
+"""Nginx proxy cache testing module, runs nginx/default.conf in front of the testing
+application and is skipped when nginx executable is not found unless NGINX_TESTS_REQUIRED
+is set, docker-compose.test.yml runs it in a container with nginx installed"""
+
+import shutil
+import socket
+import subprocess
+from os import environ
+from http.client import HTTPConnection
+from threading import Thread
+from time import monotonic, sleep
+
+import pytest
+from werkzeug.serving import make_server
+
+from movie_library import db
+from movie_library.models import Genre
+from movie_library.utils import commit_changes
+
+# single process keeps temporary files accessible when tests run as root in container
+NGINX_CONFIG = '''master_process off;
+pid {path}/nginx.pid;
+error_log {path}/error.log;
+events {{}}
+http {{
+    access_log off;
+    client_body_temp_path {path}/client_body;
+    proxy_temp_path {path}/proxy;
+    fastcgi_temp_path {path}/fastcgi;
+    uwsgi_temp_path {path}/uwsgi;
+    scgi_temp_path {path}/scgi;
+    include {path}/default.conf;
+}}
+'''
+
+pytestmark = pytest.mark.skipif(shutil.which('nginx') is None and
+                                not environ.get('NGINX_TESTS_REQUIRED'),
+                                reason='nginx is not installed')
+
+
+def get_free_port() -> int:
+    """Returns port free on the local interface"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 5):
+    """Waits until the port accepts connections"""
+    deadline = monotonic() + timeout
+    while monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return
+        except OSError:
+            sleep(0.05)
+    raise TimeoutError(f'Port {port} is not ready.')
+
+
+@pytest.fixture(scope='class')
+def nginx_port(app, client, tmp_path_factory):
+    """Runs the application behind nginx with the project config, returns nginx port"""
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    path = tmp_path_factory.mktemp('nginx')
+    port = get_free_port()
+    with open('nginx/default.conf', encoding='utf8') as file:
+        config = file.read()
+    config = config.replace('server web:8000;', f'server 127.0.0.1:{server.server_port};') \
+        .replace('listen 80;', f'listen 127.0.0.1:{port};') \
+        .replace('/var/cache/nginx/movie_library', str(path / 'cache'))
+    (path / 'default.conf').write_text(config, encoding='utf8')
+    (path / 'nginx.conf').write_text(NGINX_CONFIG.format(path=path), encoding='utf8')
+
+    nginx = subprocess.Popen(['nginx', '-p', str(path), '-c', str(path / 'nginx.conf'),
+                              '-g', 'daemon off;'])
+    try:
+        wait_for_port(port)
+        yield port
+    finally:
+        nginx.terminate()
+        nginx.wait(5)
+        server.shutdown()
+
+
+def get(port: int, path: str, headers: dict = None):
+    """Makes GET request to nginx and returns response with read body"""
+    connection = HTTPConnection('127.0.0.1', port, timeout=5)
+    connection.request('GET', path, headers=headers or {})
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response
+
+
+class TestNginxCache:
+    """Tests nginx stores public responses and bypasses authenticated clients"""
+
+    @staticmethod
+    def test_anonymous_cached(nginx_port):
+        """Tests repeated anonymous get is served by nginx"""
+        db.session.add(Genre(title='Drama'))
+        commit_changes()
+
+        first_response = get(nginx_port, '/genres')
+        second_response = get(nginx_port, '/genres')
+        assert first_response.status == 200
+        assert first_response.getheader('Cache-Control').startswith('public')
+        assert first_response.getheader('X-Cache-Status') == 'MISS'
+        assert second_response.getheader('X-Cache-Status') == 'HIT'
+
+    @staticmethod
+    def test_session_bypassed(nginx_port):
+        """Tests client with session cookie gets private response from the application"""
+        response = get(nginx_port, '/genres', {'Cookie': 'session=token'})
+        assert response.getheader('X-Cache-Status') == 'BYPASS'
+        assert response.getheader('Cache-Control') == 'private, no-cache'
+
+    @staticmethod
+    def test_post_not_cached(nginx_port):
+        """Tests changing requests pass through the cache"""
+        connection = HTTPConnection('127.0.0.1', nginx_port, timeout=5)
+        connection.request('POST', '/genres', body='{}',
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+        assert response.status == 403
+        assert response.getheader('X-Cache-Status') is None
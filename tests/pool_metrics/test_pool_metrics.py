@@ -0,0 +1,61 @@
+"""Connection pool metrics testing module"""
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.pool import QueuePool
+
+from config import get_engine_options
+from movie_library.pool_metrics import PoolMetrics
+
+
+class TestEngineOptions:
+    """Tests engine options built from environment variables"""
+
+    @staticmethod
+    def test_environment(monkeypatch):
+        """Tests pool options and statement timeout are taken from environment"""
+        monkeypatch.setenv('DB_POOL_SIZE', '8')
+        monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+        monkeypatch.setenv('DB_STATEMENT_TIMEOUT', '5000')
+
+        options = get_engine_options()
+        assert options['pool_size'] == 8
+        assert options['pool_pre_ping'] is False
+        assert options['connect_args']['options'] == '-c statement_timeout=5000'
+
+    @staticmethod
+    def test_statement_timeout_disabled(monkeypatch):
+        """Tests zero statement timeout is not sent to the server"""
+        monkeypatch.setenv('DB_STATEMENT_TIMEOUT', '0')
+        assert 'options' not in get_engine_options()['connect_args']
+
+
+class TestPoolMetrics:
+    """Tests connection pool metrics"""
+
+    @staticmethod
+    def test_queue_pool(tmp_path):
+        """Tests checkouts, hold times and queue pool state are counted"""
+        app = Flask('pool_metrics_test')
+        app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "pool.db"}',
+                          SQLALCHEMY_TRACK_MODIFICATIONS=False,
+                          SQLALCHEMY_ENGINE_OPTIONS={'poolclass': QueuePool, 'pool_size': 1,
+                                                     'max_overflow': 1,
+                                                     'pool_pre_ping': True})
+        db = SQLAlchemy(app)
+        metrics = PoolMetrics(app, db)
+
+        with app.app_context():
+            first_connection = db.engine.connect()
+            second_connection = db.engine.connect()
+            stats = metrics.stats()
+            assert stats['checked_out'] == stats['max_checked_out'] == 2
+            assert stats['overflow'] == 1
+            first_connection.close()
+            second_connection.close()
+
+        stats = metrics.stats()
+        assert stats['connects'] == stats['checkouts'] == 2
+        assert stats['checked_out'] == 0
+        assert stats['avg_hold_ms'] >= 0
+        assert stats['idle'] == 1
@@ -0,0 +1,87 @@
+"""Read replica routing testing module"""
+
+from http import HTTPStatus
+from itertools import cycle
+import json
+
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.pool import StaticPool
+
+from movie_library import db, replica_router
+from movie_library.models import Director
+from movie_library.replicas import is_write_clause
+from tests.utils import login_user, logout_user
+
+
+@pytest.fixture(scope='class')
+def replica(client):
+    """Fixture for routing reads to in-memory copy of the database
+    which has one director more than the primary"""
+    engine = create_engine('sqlite://', poolclass=StaticPool,
+                           connect_args={'check_same_thread': False})
+    primary_connection, replica_connection = db.engine.raw_connection(), engine.raw_connection()
+    primary_connection.backup(replica_connection.connection)
+    primary_connection.close()
+    replica_connection.close()
+    with engine.begin() as connection:
+        connection.execute(Director.__table__.insert(),
+                           {'first_name': 'Replica', 'last_name': 'Director'})
+
+    engines, engine_cycle = replica_router.engines, replica_router._engine_cycle
+    replica_router.engines, replica_router._engine_cycle = [engine], cycle([engine])
+    yield engine
+    db.session.remove()
+    replica_router.engines, replica_router._engine_cycle = engines, engine_cycle
+    engine.dispose()
+
+
+@pytest.mark.usefixtures('replica')
+class TestReplicaRouting:
+    """Tests read-only handlers read from replica unless the client has just written"""
+
+    @staticmethod
+    def test_get_from_replica(client):
+        """Tests director existing only on replica is returned"""
+        response = client.get('/directors/1')
+        assert response.status_code == HTTPStatus.OK, \
+            '[GET] /directors/1 should read from replica.'
+        assert response.json['first_name'] == 'Replica'
+
+    @staticmethod
+    def test_write_goes_to_primary(client):
+        """Tests post is written to the primary, the next read is kept there"""
+        login_user(client, login='admin', password='admin')
+        response = client.post('/directors', data=json.dumps({'first_name': 'Primary',
+                                                              'last_name': 'Director'}),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.CREATED
+
+        reads = replica_router.stats()['primary_reads']
+        response = client.get('/directors/1')
+        assert response.json['first_name'] == 'Primary', \
+            '[GET] /directors/1 should read own write from primary.'
+        assert replica_router.stats()['primary_reads'] == reads + 1
+
+    @staticmethod
+    def test_window_expired(client, monkeypatch):
+        """Tests reads return to replica when read-your-writes window is over"""
+        monkeypatch.setattr(replica_router, 'window', 0)
+        response = client.get('/directors/1')
+        assert response.json['first_name'] == 'Replica'
+        logout_user(client)
+
+
+class TestWriteClause:
+    """Tests clauses which must go to the primary"""
+
+    @staticmethod
+    @pytest.mark.parametrize('clause, expected', [
+        (select(Director.id), False),
+        (select(Director.id).with_for_update(), True),
+        (update(Director.__table__).values(description=''), True),
+        (None, False),
+    ])
+    def test_is_write_clause(clause, expected):
+        """Tests selects go to replica, changes and row locks go to the primary"""
+        assert is_write_clause(clause) is expected
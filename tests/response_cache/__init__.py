@@ -0,0 +1 @@
+"""Shared response cache tests"""
@@ -0,0 +1,196 @@
+"""Shared response cache testing module"""
+
+from threading import Event
+
+import pytest
+from flask import Flask, Response
+
+from movie_library.response_cache import MemoryBackend, SQLiteBackend, ResponseCache, HotKeys
+
+
+def make_cache(**config) -> ResponseCache:
+    """Makes response cache of application with memory backend"""
+    app = Flask('response_cache_test')
+    app.config.update(RESPONSE_CACHE_BACKEND='memory', RESPONSE_CACHE_URL='',
+                      RESPONSE_CACHE_TTL=60, RESPONSE_CACHE_HOT_KEYS=0, RESPONSE_CACHE_REFRESH_INTERVAL=10)
+    app.config.update(config)
+    return ResponseCache(app)
+
+
+def make_response(body: bytes, status: int = 200) -> Response:
+    """Makes JSON response"""
+    return Response(body, status=status, mimetype='application/json')
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    """Fixture for every backend available in tests"""
+    if request.param == 'sqlite':
+        return SQLiteBackend(str(tmp_path / 'responses.db'))
+    return MemoryBackend()
+
+
+class TestBackends:
+    """Tests response cache backends"""
+
+    @staticmethod
+    def test_get_set(backend):
+        """Tests values are got until they expire or are cleared"""
+        backend.set('fresh', b'[]', 60)
+        backend.set('expired', b'{}', -1)
+        assert backend.get('fresh') == b'[]'
+        assert backend.get('expired') is None
+        assert backend.get('missing') is None
+
+        backend.clear()
+        assert backend.get('fresh') is None
+
+    @staticmethod
+    def test_sqlite_shared(tmp_path):
+        """Tests sqlite backends opened by different workers share entries"""
+        file_path = str(tmp_path / 'responses.db')
+        SQLiteBackend(file_path).set('key', b'[1]', 60)
+        assert SQLiteBackend(file_path).get('key') == b'[1]'
+
+    @staticmethod
+    def test_memory_eviction():
+        """Tests the least recently used entry is evicted"""
+        backend = MemoryBackend(maxsize=2)
+        backend.set('first', b'1', 60)
+        backend.set('second', b'2', 60)
+        backend.get('first')
+        backend.set('third', b'3', 60)
+        assert backend.get('second') is None
+        assert backend.get('first') == b'1'
+
+
+class TestResponseCache:
+    """Tests response cache extension"""
+
+    @staticmethod
+    def test_only_successful_cached():
+        """Tests error responses are made every time"""
+        cache = make_cache()
+        calls = []
+
+        def make_status_response(status):
+            calls.append(status)
+            return make_response(b'{}', status)
+
+        for status in (404, 404, 200, 200):
+            response = cache.get_or_set(('movie', status), lambda: make_status_response(status))
+            assert response.status_code == status
+        assert calls == [404, 404, 200]
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 3
+
+    @staticmethod
+    def test_expired_missed():
+        """Tests expired entry is made again"""
+        cache = make_cache(RESPONSE_CACHE_TTL=0)
+        cache.get_or_set('movies', lambda: make_response(b'[1]'))
+        assert cache.get_or_set('movies', lambda: make_response(b'[2]')).data == b'[2]'
+
+    @staticmethod
+    def test_hot_keys_refreshed_after_versions_move():
+        """Tests the most requested responses are made in background only for new versions"""
+        cache = make_cache(RESPONSE_CACHE_HOT_KEYS=1)
+        cache.start_refresher = lambda: None
+        versions = {'movies': 1, 'directors': 1}
+        made = []
+
+        def make_refresh(name):
+            def make():
+                made.append((name, versions[name]))
+                return make_response(f'"{name}{versions[name]}"'.encode())
+            return lambda: ((name, versions[name]), make)
+
+        for name in ('movies', 'movies', 'directors'):
+            cache.get_or_set((name, 1), lambda name=name: make_response(f'"{name}1"'.encode()),
+                             name, make_refresh(name))
+
+        cache.refresh_hot_keys()
+        assert made == [], 'Cached response of current versions should not be made again'
+
+        versions.update(movies=2, directors=2)
+        cache.refresh_hot_keys()
+        assert made == [('movies', 2)]
+        assert cache.stats()['refreshes'] == 1
+        hits = cache.stats()['hits']
+        assert cache.get_or_set(('movies', 2), lambda: make_response(b'')).data == b'"movies2"'
+        assert cache.stats()['hits'] == hits + 1
+
+    @staticmethod
+    def test_failed_responses_not_hot():
+        """Tests failed requests are not counted as hot keys"""
+        cache = make_cache(RESPONSE_CACHE_HOT_KEYS=1)
+        cache.start_refresher = lambda: None
+
+        def make_error():
+            raise ValueError('Sorting by relevance requires search parameter.')
+
+        with pytest.raises(ValueError):
+            cache.get_or_set(('movies', 1), make_error, 'movies', lambda: ('movies', make_error))
+        cache.get_or_set(('genres', 1), lambda: make_response(b'[]', 400),
+                         'genres', lambda: ('genres', make_error))
+        assert cache.stats()['hot_keys'] == 0
+
+    @staticmethod
+    def test_refresh_error_counted():
+        """Tests refresh errors are counted and do not stop refresh of other keys"""
+        cache = make_cache(RESPONSE_CACHE_HOT_KEYS=2)
+        cache.start_refresher = lambda: None
+
+        def make_error():
+            raise ValueError('Incorrect cursor.')
+
+        cache.get_or_set(('broken', 1), lambda: make_response(b'[]'),
+                         'broken', lambda: (('broken', 2), make_error))
+        cache.get_or_set(('movies', 1), lambda: make_response(b'[]'),
+                         'movies', lambda: (('movies', 2), lambda: make_response(b'[2]')))
+        cache.refresh_hot_keys()
+        assert cache.stats()['refresh_errors'] == 1
+        assert cache.stats()['refreshes'] == 1
+
+    @staticmethod
+    def test_refresher_survives_error():
+        """Tests refresher thread keeps running after a refresh raised"""
+        cache = make_cache(RESPONSE_CACHE_HOT_KEYS=1, RESPONSE_CACHE_REFRESH_INTERVAL=0)
+        refreshed = Event()
+        calls = []
+
+        def refresh_hot_keys():
+            calls.append(None)
+            if len(calls) == 1:
+                raise RuntimeError('refresh failed')
+            refreshed.set()
+
+        cache.refresh_hot_keys = refresh_hot_keys
+        cache.start_refresher()
+        assert refreshed.wait(5), 'Refresher should run again after an error'
+        assert cache._refresher.is_alive()  # pylint: disable=protected-access
+
+    @staticmethod
+    def test_incorrect_backend():
+        """Tests unknown backend name is rejected"""
+        with pytest.raises(ValueError):
+            make_cache(RESPONSE_CACHE_BACKEND='memcached')
+
+
+class TestHotKeys:
+    """Tests hot keys tracker"""
+
+    @staticmethod
+    def test_top_decays():
+        """Tests keys requested lately come first and cold keys are forgotten"""
+        hot_keys = HotKeys()
+        for key in ('movies', 'movies', 'movies', 'movies', 'directors'):
+            hot_keys.record(key, lambda: None)
+        assert [key for key, _ in hot_keys.pop_top(1)] == ['movies']
+
+        for _ in range(3):
+            hot_keys.record('directors', lambda: None)
+        assert [key for key, _ in hot_keys.pop_top(2)] == ['directors', 'movies']
+        for _ in range(2):
+            hot_keys.pop_top(2)
+        assert len(hot_keys) == 0
@@ -0,0 +1,65 @@
+"""Serializer testing module"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from flask_restx import Model, fields, marshal
+
+from movie_library import api
+from movie_library.serializer import compile_model
+
+FIELD_VALUES = {fields.String: 'text', fields.Integer: '7', fields.Float: Decimal('8.25'),
+                fields.Boolean: 1, fields.DateTime: datetime(2008, 7, 18, 10, 30),
+                fields.Raw: {'title': ['Error.']}}
+
+
+def make_object(api_model: dict, as_dict: bool = False):
+    """Makes object or dictionary with value of every field of the model"""
+    values = {}
+    for key, field in api_model.items():
+        if isinstance(field, fields.Nested):
+            values[key] = make_object(field.nested, as_dict)
+        elif isinstance(field, fields.List):
+            container = field.container
+            values[key] = [make_object(container.nested, as_dict), None] \
+                if isinstance(container, fields.Nested) else [FIELD_VALUES[type(container)]]
+        else:
+            values[key] = FIELD_VALUES[type(field)]
+    return values if as_dict else SimpleNamespace(**values)
+
+
+class TestCompiledSerializer:
+    """Tests compiled serializer makes the same output as flask-restx marshal"""
+
+    @staticmethod
+    @pytest.mark.parametrize('model_name', sorted(api.models))
+    @pytest.mark.parametrize('make_data', [
+        lambda api_model: make_object(api_model),
+        lambda api_model: make_object(api_model, as_dict=True),
+        lambda api_model: [make_object(api_model), make_object(api_model, as_dict=True)],
+        lambda api_model: SimpleNamespace(),
+        lambda api_model: None,
+        lambda api_model: {key: None for key in api_model},
+    ], ids=['object', 'dict', 'list', 'empty', 'none', 'nulls'])
+    def test_models(model_name, make_data):
+        """Tests output for every application model"""
+        api_model = api.models[model_name]
+        data = make_data(api_model)
+
+        assert json.dumps(compile_model(api_model)(data)) == json.dumps(marshal(data, api_model))
+
+    @staticmethod
+    def test_not_compilable_fields():
+        """Tests fields with dotted attributes and callable defaults are left to flask-restx"""
+        api_model = Model('NotCompilable', {
+            'name': fields.String(attribute='director.first_name'),
+            'created': fields.String(default=lambda: 'now'),
+            'tags': fields.List(fields.String, default=[]),
+        })
+        data = SimpleNamespace(director=SimpleNamespace(first_name='Quentin'), tags={'a'})
+
+        assert compile_model(api_model)(data) == marshal(data, api_model)
+        assert compile_model(api_model) is compile_model(api_model)
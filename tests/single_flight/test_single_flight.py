@@ -0,0 +1,115 @@
+"""Request coalescing testing module"""
+
+from threading import Event, Semaphore, Thread
+
+import pytest
+
+from movie_library.single_flight import SingleFlight
+
+
+class CountingSingleFlight(SingleFlight):
+    """Single flight which signals every caller starting to wait"""
+
+    def __init__(self, timeout: float):
+        """Constructor takes wait timeout"""
+        super().__init__()
+        self.timeout = timeout
+        self.waiting = Semaphore(0)
+
+    def wait(self, flight, function):
+        """Signals waiting caller"""
+        self.waiting.release()
+        return super().wait(flight, function)
+
+
+def run_concurrently(single_flight: CountingSingleFlight, function, followers: int) -> list:
+    """Calls function by leader and followers with the same key, the leader
+    is released after all followers wait, returns results or errors of the calls"""
+    started, release = Event(), Event()
+    results = []
+
+    def leader_function():
+        started.set()
+        release.wait(5)
+        return function()
+
+    def call(function_):
+        try:
+            results.append(single_flight.do('movies', function_))
+        except ValueError as error:
+            results.append(error)
+
+    threads = [Thread(target=call, args=(leader_function,))]
+    threads[0].start()
+    started.wait(5)
+    threads += [Thread(target=call, args=(function,)) for _ in range(followers)]
+    for thread in threads[1:]:
+        thread.start()
+    for _ in range(followers):
+        single_flight.waiting.acquire(timeout=5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+class TestSingleFlight:
+    """Tests concurrent calls with equal keys share one computation"""
+
+    @staticmethod
+    def test_result_shared():
+        """Tests function runs once and its result is returned to every caller"""
+        single_flight = CountingSingleFlight(timeout=5)
+        calls = []
+
+        def function():
+            calls.append(1)
+            return b'[]'
+
+        assert run_concurrently(single_flight, function, followers=4) == [b'[]'] * 5
+        assert len(calls) == 1
+        assert single_flight.stats() == {'executed': 1, 'coalesced': 4,
+                                         'timeouts': 0, 'in_flight': 0}
+
+    @staticmethod
+    def test_error_shared():
+        """Tests exception of the function is raised in every caller"""
+        single_flight = CountingSingleFlight(timeout=5)
+
+        def function():
+            raise ValueError('No movies found.')
+
+        results = run_concurrently(single_flight, function, followers=2)
+        assert len(results) == 3
+        assert all(isinstance(result, ValueError) for result in results)
+        assert single_flight.stats()['in_flight'] == 0
+
+    @staticmethod
+    def test_timeout_fallback():
+        """Tests caller which waited too long computes the result itself"""
+        single_flight = SingleFlight()
+        single_flight.timeout = 0.01
+        started, release = Event(), Event()
+
+        def leader_function():
+            started.set()
+            release.wait(5)
+            return b'[1]'
+
+        leader = Thread(target=single_flight.do, args=('movies', leader_function))
+        leader.start()
+        started.wait(5)
+        assert single_flight.do('movies', lambda: b'[2]') == b'[2]'
+        release.set()
+        leader.join(5)
+        assert single_flight.stats() == {'executed': 1, 'coalesced': 0,
+                                         'timeouts': 1, 'in_flight': 0}
+
+    @staticmethod
+    def test_sequential_calls():
+        """Tests calls which do not overlap are not coalesced"""
+        single_flight = SingleFlight()
+        assert [single_flight.do('movies', lambda: 1) for _ in range(2)] == [1, 1]
+        with pytest.raises(KeyError):
+            single_flight.do('movies', lambda: {}['missing'])
+        assert single_flight.stats()['executed'] == 3
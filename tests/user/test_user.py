@@ -1,10 +1,15 @@
 """User testing module"""
 
+from datetime import datetime
 from http import HTTPStatus
+from time import monotonic
 import json
 import pytest
+from sqlalchemy.exc import OperationalError
 
-from tests.utils import load_json, register
+from movie_library import db, activity_tracker
+from movie_library.models import User
+from tests.utils import load_json, register, count_queries, login_user, logout_user
 
 
 @pytest.fixture(scope='function')
@@ -54,3 +59,104 @@ class TestUser:
                                content_type='application/json')
         assert response.status_code == HTTPStatus.OK, \
             '[POST] /user/password-change should return 200'
+
+
+class TestUserCache:
+    """Tests cached user loader"""
+
+    @staticmethod
+    def test_load_user_cached(client, monkeypatch):
+        """Tests authenticated requests do not select the user row after the first one"""
+        monkeypatch.setattr(activity_tracker, 'flush_interval', 3600)
+        login_user(client)
+        client.get('/genres')
+
+        with count_queries(db) as queries:
+            client.get('/genres')
+        assert not [query for query in queries if query.startswith('SELECT user.')], \
+            'Cached user should be loaded without query'
+        logout_user(client)
+
+    @staticmethod
+    def test_password_change_invalidates_cache(client):
+        """Tests changed password is used right after password change"""
+        login_user(client)
+        client.get('/genres')
+        client.post('/user/password-change',
+                    data=json.dumps({'old_password': '12345', 'new_password1': '54321',
+                                     'new_password2': '54321'}),
+                    content_type='application/json')
+
+        response = client.post('/user/password-change',
+                               data=json.dumps({'old_password': '54321',
+                                                'new_password1': '12345',
+                                                'new_password2': '12345'}),
+                               content_type='application/json')
+        assert response.status_code == HTTPStatus.OK, \
+            '[POST] /user/password-change with the new password should return 200'
+        logout_user(client)
+
+
+@pytest.fixture(scope='function')
+def tracker(monkeypatch):
+    """Gives the test empty activity tracker state, the previous state is restored after"""
+    for name, value in (('pending', {}), ('last_flush', monotonic()), ('recorded', 0),
+                        ('flushes', 0), ('flush_errors', 0)):
+        monkeypatch.setattr(activity_tracker, name, value)
+    return activity_tracker
+
+
+class TestActivityTracker:
+    """Tests batched user last activity tracking"""
+
+    @staticmethod
+    def test_flush_coalesces_activity(tracker):
+        """Tests recorded activity is coalesced per user and flushed by one update"""
+        users = User.query.filter(User.username.in_(['admin', 'another'])).all()
+        for user in users:
+            tracker.record(user.id, datetime(2030, 1, 1))
+            tracker.record(user.id, datetime(2030, 1, 2))
+
+        with count_queries(db) as queries:
+            tracker.flush()
+
+        assert len([query for query in queries if query.startswith('UPDATE')]) == 1
+        for user in users:
+            db.session.refresh(user)
+            assert user.last_activity == datetime(2030, 1, 2)
+
+    @staticmethod
+    def test_flush_if_due_waits_interval(tracker, monkeypatch):
+        """Tests activity is not written until flush interval has passed"""
+        user = User.query.filter_by(username='another').first()
+        user.last_activity = datetime(2030, 2, 1)
+        db.session.commit()
+        monkeypatch.setattr(tracker, 'flush_interval', 3600)
+        tracker.record(user.id, datetime(2030, 2, 2))
+
+        tracker.flush_if_due()
+        db.session.refresh(user)
+        assert user.last_activity == datetime(2030, 2, 1)
+
+        monkeypatch.setattr(tracker, 'flush_interval', 0)
+        tracker.flush_if_due()
+        db.session.refresh(user)
+        assert user.last_activity == datetime(2030, 2, 2)
+
+    @staticmethod
+    def test_flush_error_requeued(tracker, monkeypatch):
+        """Tests failed flush keeps activity for the next flush and does not raise"""
+        user = User.query.filter_by(username='another').first()
+        tracker.record(user.id, datetime(2030, 3, 1))
+
+        def execute(*args, **kwargs):
+            raise OperationalError('UPDATE user', {}, Exception('database is locked'))
+        with monkeypatch.context() as patch:
+            patch.setattr(db.session, 'execute', execute)
+            tracker.flush()
+
+        assert tracker.stats() == {'recorded': 1, 'flushes': 0, 'flush_errors': 1, 'pending': 1}
+        tracker.flush()
+        db.session.refresh(user)
+        assert user.last_activity == datetime(2030, 3, 1)
+        assert tracker.stats()['pending'] == 0
@@ -1,6 +1,9 @@
 """Utils module for tests"""
 
 import json
+from contextlib import contextmanager
+
+from sqlalchemy import event
 from werkzeug.security import generate_password_hash
 
 from movie_library.models.user import User
@@ -53,3 +56,18 @@ def login_user(client, login='username', password='12345'):
     client.post('/user/login', data=json.dumps(
         {"username_or_email": login, "password": password}),
                 content_type="application/json")
+
+
+@contextmanager
+def count_queries(db):
+    """Counts SQL statements executed inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)